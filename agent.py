@@ -0,0 +1,61 @@
+import random
+
+from player import CONTROLS
+from simulation import PressedKeys
+from world import ENTITY_ENEMY
+
+# Напрямок -> клавіша, яку "натискає" агент
+DIRECTION_KEYS = {direction: keys[0] for keys, (direction, _, _) in CONTROLS}
+MOVE_DIRECTIONS = tuple(DIRECTION_KEYS)
+
+# На скільки клітинок агент помічає ворога на своїй лінії
+AIM_RANGE = 8
+# Раз на скільки тіків блукання змінює напрямок і скільки тіків стояти на місці - це "застряг"
+WANDER_TICKS = 40
+STUCK_TICKS = 12
+# Імовірність пострілу під час блукання (прострілює цеглу)
+WANDER_SHOOT = 0.1
+
+
+# Скриптований гравець для headless-прогонів: якщо ворог на одній лінії - повертається до нього
+# і стріляє, інакше блукає. Усі рішення від seed, тож прогін відтворюваний
+class ScriptedAgent:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.direction = self.rng.choice(MOVE_DIRECTIONS)
+        self.timer = WANDER_TICKS
+        self.last_pos = None
+        self.stuck = 0
+
+    def act(self, game):
+        player = game.player
+        target = self.aim(game.world, player.x, player.y)
+        if target is not None:
+            return PressedKeys([DIRECTION_KEYS[target]]), True
+
+        pos = (player.x, player.y)
+        self.stuck = self.stuck + 1 if pos == self.last_pos else 0
+        self.last_pos = pos
+        self.timer -= 1
+
+        if self.timer <= 0 or self.stuck >= STUCK_TICKS:
+            self.direction = self.rng.choice(MOVE_DIRECTIONS)
+            self.timer = WANDER_TICKS
+            self.stuck = 0
+
+        return PressedKeys([DIRECTION_KEYS[self.direction]]), self.rng.random() < WANDER_SHOOT
+
+    # Напрямок на найближчого ворога в тому ж рядку чи стовпці або None
+    def aim(self, world, x, y):
+        best = None
+        best_dist = AIM_RANGE + 1
+        for i in world.indices(ENTITY_ENEMY).tolist():
+            ex = int(world.x[i])
+            ey = int(world.y[i])
+            if ex == x and abs(ey - y) < best_dist:
+                best_dist = abs(ey - y)
+                best = "UP" if ey < y else "DOWN"
+            elif ey == y and abs(ex - x) < best_dist:
+                best_dist = abs(ex - x)
+                best = "LEFT" if ex < x else "RIGHT"
+        return best
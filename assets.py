@@ -1,10 +1,48 @@
-# assets.py
 import os
+import json
+import math
 import pygame
 from settings import TILE
 
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 
+# Атлас: усі картинки вже зменшені до TILE в одному файлі + індекс з позиціями і даними джерел
+ATLAS_IMAGE = os.path.join(ASSETS_DIR, "atlas.png")
+ATLAS_INDEX = os.path.join(ASSETS_DIR, "atlas.json")
+
+# ім'я в модулі assets -> файл-джерело
+ASSET_FILES = {
+    "player_up": "tank_top.png",
+    "player_down": "tank_bottom.png",
+    "player_left": "tank_left.png",
+    "player_right": "tank_right.png",
+
+    "enemy_up": "enemy_top.png",
+    "enemy_down": "enemy_bottom.png",
+    "enemy_left": "enemy_left.png",
+    "enemy_right": "enemy_right.png",
+
+    "brick": "brick.webp",
+    "steel": "steel.webp",
+    "water": "water.jpg",
+    "grass": "leaves.webp",
+
+    "bullet_vertical": "bullet.png",
+    "bullet_horizontal": "bullet _hor.png",
+    "explossion": "explossion_tank.png",
+
+    "bonus_GRENADE": "grenade.png",
+    "bonus_SHIELD": "shield.png",
+    "bonus_HEART": "heart.png",
+    "bonus_FREEZE": "freeze.png",
+    "bonus_SHOVEL": "showel.png",
+
+    "base": "base.png",
+    "base_destroyed": "base_destroyed.png",
+}
+
+BONUS_TYPES = ("GRENADE", "SHIELD", "HEART", "FREEZE", "SHOVEL")
+
 player_up = None
 player_down = None
 player_left = None
@@ -36,35 +74,93 @@ def load_image(filename, size):
     return pygame.transform.scale(image, (size, size))
 
 
-def load_assets():
-    global player_up, player_down, player_left, player_right, enemy_up, enemy_down, enemy_left, enemy_right, brick, steel, water, bullet_vertical, bullet_horizontal, grass, explossion, bonus_images, base, base_destroyed
-
-    player_up = load_image("tank_top.png", TILE)
-    player_down = load_image("tank_bottom.png", TILE)
-    player_left = load_image("tank_left.png", TILE)
-    player_right = load_image("tank_right.png", TILE)
- 
-    enemy_up = load_image("enemy_top.png", TILE)
-    enemy_down = load_image("enemy_bottom.png", TILE)
-    enemy_left = load_image("enemy_left.png", TILE)
-    enemy_right = load_image("enemy_right.png", TILE)
-
-    brick = load_image("brick.webp", TILE)
-    steel = load_image("steel.webp", TILE)
-    water = load_image("water.jpg", TILE)
-    grass = load_image("leaves.webp", TILE)
-
-    bullet_vertical = load_image("bullet.png",TILE)
-    bullet_horizontal = load_image("bullet _hor.png", TILE)
-    explossion = load_image("explossion_tank.png", TILE)
-
-    bonus_images = {
-        "GRENADE": load_image("grenade.png", TILE),
-        "SHIELD": load_image("shield.png", TILE),
-        "HEART": load_image("heart.png", TILE),
-        "FREEZE": load_image("freeze.png", TILE),
-        "SHOVEL": load_image("showel.png", TILE)
+# Розмір і час зміни кожного джерела - якщо щось змінилось, атлас застарів
+def source_stamps():
+    stamps = {}
+    for filename in ASSET_FILES.values():
+        st = os.stat(os.path.join(ASSETS_DIR, filename))
+        stamps[filename] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+
+def build_atlas(images=None):
+    if images is None:
+        images = {name: load_image(filename, TILE) for name, filename in ASSET_FILES.items()}
+
+    names = list(ASSET_FILES)
+    columns = math.ceil(math.sqrt(len(names)))
+    rows = math.ceil(len(names) / columns)
+
+    atlas = pygame.Surface((columns * TILE, rows * TILE), pygame.SRCALPHA)
+    positions = {}
+
+    for i, name in enumerate(names):
+        x = (i % columns) * TILE
+        y = (i // columns) * TILE
+        atlas.blit(images[name], (x, y))
+        positions[name] = [x, y]
+
+    index = {
+        "tile": TILE,
+        "sources": source_stamps(),
+        "sprites": positions,
     }
 
-    base = load_image("base.png", TILE)
-    base_destroyed = load_image("base_destroyed.png", TILE)
+    pygame.image.save(atlas, ATLAS_IMAGE)
+    with open(ATLAS_INDEX, "w") as f:
+        json.dump(index, f, indent=4)
+
+    return atlas, index
+
+
+# Повертає словник ім'я -> картинка з атласу, або None, якщо атласу немає чи він застарів
+def load_atlas():
+    try:
+        with open(ATLAS_INDEX) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if index.get("tile") != TILE or set(index.get("sprites", ())) != set(ASSET_FILES):
+        return None
+
+    try:
+        if index.get("sources") != source_stamps():
+            return None
+        atlas = pygame.image.load(ATLAS_IMAGE)
+    except (OSError, pygame.error):
+        return None
+
+    if pygame.display.get_surface():
+        atlas = atlas.convert_alpha()
+
+    return {
+        name: atlas.subsurface((x, y, TILE, TILE))
+        for name, (x, y) in index["sprites"].items()
+    }
+
+
+def load_assets():
+    global bonus_images
+
+    images = load_atlas()
+
+    if images is None:
+        # атлас відсутній або застарів - читаємо джерела і перебудовуємо його
+        images = {name: load_image(filename, TILE) for name, filename in ASSET_FILES.items()}
+        try:
+            build_atlas(images)
+        except (OSError, pygame.error) as e:
+            print(f"Не вдалося зберегти атлас: {e}")
+
+    for name in ASSET_FILES:
+        if not name.startswith("bonus_"):
+            globals()[name] = images[name]
+
+    bonus_images = {bonus_type: images[f"bonus_{bonus_type}"] for bonus_type in BONUS_TYPES}
+
+
+if __name__ == "__main__":
+    # Крок збірки: python assets.py
+    atlas, index = build_atlas()
+    print(f"Атлас {ATLAS_IMAGE}: {len(index['sprites'])} картинок, {atlas.get_width()}x{atlas.get_height()}")
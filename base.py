@@ -10,12 +10,12 @@ class Base:
         self.alive = True
         self.rect = pygame.Rect(x * TILE, y * TILE, TILE, TILE)
 
-    def draw(self, screen):
+    def draw(self, screen, ox=0, oy=0):
         
         if self.alive:
-            screen.blit(assets.base, (self.x * TILE, self.y * TILE))
+            screen.blit(assets.base, (self.x * TILE - ox, self.y * TILE - oy))
         else:
-            screen.blit(assets.base_destroyed, (self.x * TILE, self.y * TILE))
+            screen.blit(assets.base_destroyed, (self.x * TILE - ox, self.y * TILE - oy))
 
 
     def destroy(self):
@@ -0,0 +1,269 @@
+import os
+import sys
+import copy
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from collections import defaultdict
+
+# Прогони працюють без вікна і звуку
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from settings import ENEMY_TYPES
+from enemies import enemy
+from game import Game
+from simulation import Simulation
+from agent import ScriptedAgent
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DIFFICULTIES = ("EASY", "NORMAL", "HARD", "HARDCORE")
+# Режим -> тека з його рівнями
+LEVEL_DIRS = {"CAMPAIGN": "levels", "DEFAULT": "classic_levels"}
+
+# Забіг довший за це вважається нічиєю (TIMEOUT): 5 хвилин гри
+DEFAULT_MAX_TICKS = 60 * 60 * 5
+
+GROUP_FIELDS = ("variant", "mode", "difficulty", "level")
+
+
+def level_numbers(mode):
+    folder = os.path.join(BASE_DIR, LEVEL_DIRS[mode])
+    numbers = []
+    for name in os.listdir(folder):
+        stem, ext = os.path.splitext(name)
+        if ext == ".txt" and stem.startswith("level_") and stem[6:].isdigit():
+            numbers.append(int(stem[6:]))
+    return sorted(numbers)
+
+
+# "3" -> 3, "2.5" -> 2.5, "30:90" -> (30, 90) (shoot_freq)
+def parse_value(text):
+    if ":" in text:
+        return tuple(parse_value(part) for part in text.split(":"))
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+# ["lives=1,2", "FAST.speed=8,11"] -> [(ключ, [значення...]), ...]
+def parse_sweeps(items):
+    sweeps = []
+    for item in items:
+        key, sep, values = item.partition("=")
+        if not sep or not values:
+            raise ValueError(f"очікується КЛЮЧ=V1,V2,...: {item}")
+        sweeps.append((key, [parse_value(v) for v in values.split(",")]))
+    return sweeps
+
+
+# Усі комбінації значень: [(назва варіанта, заміни пресету, заміни ENEMY_TYPES)]
+def build_variants(preset_sweeps, enemy_sweeps):
+    sweeps = preset_sweeps + enemy_sweeps
+    variants = []
+    for values in itertools.product(*(vals for _, vals in sweeps)):
+        preset = {}
+        enemy_stats = {}
+        for (key, _), value in zip(sweeps, values):
+            if "." in key:
+                enemy_type, stat = key.split(".", 1)
+                enemy_stats.setdefault(enemy_type, {})[stat] = value
+            else:
+                preset[key] = value
+
+        name = " ".join(f"{key}={value}" for (key, _), value in zip(sweeps, values)) or "-"
+        variants.append((name, preset, enemy_stats))
+    return variants
+
+
+# Таблиці характеристик ворогів у цьому процесі: підміняємо лише коли варіант змінився
+_applied_enemy_stats = {}
+
+
+def apply_enemy_stats(enemy_stats):
+    global _applied_enemy_stats
+    if enemy_stats == _applied_enemy_stats:
+        return
+
+    types = copy.deepcopy(ENEMY_TYPES)
+    for enemy_type, stats in enemy_stats.items():
+        types[enemy_type].update(stats)
+    enemy.load_enemy_types(types)
+    _applied_enemy_stats = enemy_stats
+
+
+# Один забіг - один рівень; виконується у процесі пулу, повертає рядок результату
+def run_job(job):
+    variant, preset, enemy_stats, mode, difficulty, level, seed, max_ticks = job
+    apply_enemy_stats(enemy_stats)
+
+    sim = Simulation(mode, difficulty, level, seed=seed, preset=preset)
+    game = sim.game
+    agent = ScriptedAgent(seed)
+
+    # після перемоги headless-гра одразу йде на наступний рівень, тож кінець забігу - last_run
+    while game.last_run is None and not sim.done and sim.ticks < max_ticks:
+        keys, shoot = agent.act(game)
+        sim.step(1, keys, shoot)
+
+    run = game.last_run
+    if run is None:
+        run = {
+            "result": "TIMEOUT",
+            "cause": None,
+            "ticks": game.run_ticks,
+            "kills_by_type": dict(game.run_kills),
+            "lives": game.player.lives,
+        }
+
+    return {
+        "variant": variant,
+        "mode": mode,
+        "difficulty": difficulty,
+        "level": level,
+        "seed": seed,
+        "result": run["result"],
+        "cause": run["cause"],
+        "ticks": run["ticks"],
+        "kills": sum(run["kills_by_type"].values()),
+        "kills_by_type": run["kills_by_type"],
+        "base_lost": run["cause"] == "BASE",
+        "lives": run["lives"],
+    }
+
+
+def build_jobs(variants, modes, difficulties, seeds, max_ticks, levels=None):
+    jobs = []
+    for name, preset, enemy_stats in variants:
+        for mode in modes:
+            for difficulty in difficulties:
+                for level in levels or level_numbers(mode):
+                    for seed in seeds:
+                        jobs.append((name, preset, enemy_stats, mode, difficulty, level, seed, max_ticks))
+    return jobs
+
+
+# Результати приходять по мірі готовності (не в порядку jobs)
+def run_batch(jobs, workers):
+    if workers <= 1:
+        for job in jobs:
+            yield run_job(job)
+        return
+
+    # дрібні шматки, щоб повільні рівні не лишали ядра без роботи наприкінці
+    chunksize = max(1, len(jobs) // (workers * 16))
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(run_job, jobs, chunksize)
+
+
+class Summary:
+    def __init__(self, group):
+        self.group = group
+        self.rows = defaultdict(lambda: {"runs": 0, "wins": 0, "base": 0, "timeouts": 0, "ticks": 0, "kills": 0})
+
+    def add(self, result):
+        row = self.rows[tuple(result[field] for field in self.group)]
+        row["runs"] += 1
+        row["wins"] += result["result"] == "WIN"
+        row["base"] += result["base_lost"]
+        row["timeouts"] += result["result"] == "TIMEOUT"
+        row["ticks"] += result["ticks"]
+        row["kills"] += result["kills"]
+
+    def print(self, out=sys.stdout):
+        headers = {"variant": "Варіант", "mode": "Режим", "difficulty": "Складність", "level": "Рівень"}
+        widths = {
+            field: max([len(headers[field])] + [len(str(key[n])) for key in self.rows]) + 2
+            for n, field in enumerate(self.group)
+        }
+
+        line = "".join(f"{headers[field]:<{widths[field]}}" for field in self.group)
+        print(f"{line}{'Ігор':>7}{'Перемог':>9}{'База':>7}{'Час.':>7}{'Сер. тіків':>12}{'Сер. вбивств':>14}", file=out)
+        for key in sorted(self.rows, key=lambda k: tuple(str(v).zfill(4) for v in k)):
+            row = self.rows[key]
+            runs = row["runs"]
+            line = "".join(f"{str(value):<{widths[field]}}" for field, value in zip(self.group, key))
+            print(
+                f"{line}{runs:>7}{row['wins'] / runs:>9.0%}{row['base'] / runs:>7.0%}{row['timeouts'] / runs:>7.0%}"
+                f"{row['ticks'] / runs:>12.0f}{row['kills'] / runs:>14.2f}",
+                file=out,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетні headless-прогони для підбору складності")
+    parser.add_argument("--modes", nargs="+", choices=tuple(LEVEL_DIRS), default=list(LEVEL_DIRS))
+    parser.add_argument("--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES))
+    parser.add_argument("--levels", nargs="+", type=int, help="номери рівнів (за замовчуванням - усі з теки режиму)")
+    parser.add_argument("--seeds", type=int, default=10, help="скільки seed на кожну комбінацію")
+    parser.add_argument("--seed-start", type=int, default=0, help="перший seed")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS, help="ліміт тіків на забіг")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="кількість процесів")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=V1,V2",
+                        help="значення пресету складності (lives, max_enemies, spawn_speed, max_enemies_on_map, player_hp)")
+    parser.add_argument("--enemy", action="append", default=[], metavar="TYPE.STAT=V1,V2",
+                        help="характеристика ворога з ENEMY_TYPES, напр. FAST.speed=8,11 або SNIPER.shoot_freq=40:120")
+    parser.add_argument("--group", default=",".join(GROUP_FIELDS),
+                        help=f"за якими полями зводити таблицю (з {','.join(GROUP_FIELDS)})")
+    parser.add_argument("--output", metavar="FILE", help="дописувати кожен забіг рядком JSON (.jsonl)")
+    args = parser.parse_args()
+
+    group = tuple(field for field in args.group.split(",") if field)
+    if not group or any(field not in GROUP_FIELDS for field in group):
+        parser.error(f"--group: поля з {','.join(GROUP_FIELDS)}")
+
+    try:
+        preset_sweeps = parse_sweeps(args.set)
+        enemy_sweeps = parse_sweeps(args.enemy)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # ключ, якого гра не читає, дав би однакові варіанти без жодного попередження
+    presets = Game(headless=True).difficulty_presets
+    preset_keys = sorted({key for preset in presets.values() for key in preset})
+    for key, _ in preset_sweeps:
+        if key not in preset_keys:
+            parser.error(f"--set: невідомий параметр пресету: {key} (є: {', '.join(preset_keys)})")
+
+    for key, _ in enemy_sweeps:
+        enemy_type, _, stat = key.partition(".")
+        if enemy_type not in ENEMY_TYPES or not stat:
+            parser.error(f"--enemy: невідомий тип ворога або характеристика: {key}")
+
+    variants = build_variants(preset_sweeps, enemy_sweeps)
+    seeds = range(args.seed_start, args.seed_start + args.seeds)
+    jobs = build_jobs(variants, args.modes, args.difficulties, seeds, args.max_ticks, args.levels)
+
+    summary = Summary(group)
+    out = open(args.output, "a") if args.output else None
+
+    # гра читає рівні за відносними шляхами (levels/, classic_levels/)
+    os.chdir(BASE_DIR)
+    total_ticks = 0
+    started = time.perf_counter()
+
+    print(f"{len(jobs)} забігів, процесів: {args.workers}", file=sys.stderr)
+    try:
+        for done, result in enumerate(run_batch(jobs, args.workers), 1):
+            summary.add(result)
+            total_ticks += result["ticks"]
+            if out:
+                out.write(json.dumps(result) + "\n")
+            if done % 100 == 0 or done == len(jobs):
+                print(f"\r{done}/{len(jobs)}", end="", file=sys.stderr, flush=True)
+    finally:
+        if out:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    summary.print()
+    print(f"\n{len(jobs) / elapsed:.1f} забігів/с, {total_ticks / elapsed:.0f} тіків/с, {elapsed:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+
+# Бенчмарки працюють без вікна і звуку
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+import assets
+import save_manager
+import level_format
+from settings import COLS, ROWS
+from level_builder import Level
+from player import Player
+from enemies.enemy import Enemy, spawn_enemy, change_direction_smart, check_line_of_sight, update_enemies
+from flow_field import FlowField
+from camera import Camera
+from bullet import BulletStore
+from world import World, ENTITY_ENEMY, DIRECTION_CODES
+from simulation import Simulation, PressedKeys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DIFFICULTIES = ("EASY", "NORMAL", "HARD", "HARDCORE")
+MOVE_KEYS = (pygame.K_w, pygame.K_a, pygame.K_s, pygame.K_d)
+
+# Наскільки повільніше за базовий результат вважається регресією
+DEFAULT_THRESHOLD = 0.10
+
+benchmarks = {}
+
+
+def benchmark(name, ops):
+    def register(setup):
+        benchmarks[name] = (setup, ops)
+        return setup
+    return register
+
+
+# Сценарій гравця: раз на 30 тіків нова клавіша руху, постріл з імовірністю 0.2 - все від seed
+class ScriptedInput:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.keys = PressedKeys()
+        self.tick = 0
+
+    def next(self):
+        if self.tick % 30 == 0:
+            self.keys = PressedKeys([self.rng.choice(MOVE_KEYS)])
+        self.tick += 1
+        return self.keys, self.rng.random() < 0.2
+
+
+# Кожен setup повертає функцію, яка виконує ops операцій
+
+def update_play_setup(difficulty):
+    def setup():
+        script = ScriptedInput(1)
+        sim = Simulation("ARCADE", difficulty, seed=1)
+
+        def run(ops):
+            nonlocal sim
+            for _ in range(ops):
+                if sim.done:
+                    sim = Simulation("ARCADE", difficulty, seed=1)
+                keys, shoot = script.next()
+                sim.game.step(keys, shoot)
+        return run
+    return setup
+
+
+for difficulty in DIFFICULTIES:
+    benchmark(f"update_play_{difficulty.lower()}", 2000)(update_play_setup(difficulty))
+
+
+@benchmark("draw_play", 300)
+def draw_play_setup():
+    from game import Game
+
+    game = Game(seed=1)
+    game.game_mode = "DEFAULT"
+    game.get_current_level()
+    game.begin_session()
+    script = ScriptedInput(1)
+
+    def run(ops):
+        for _ in range(ops):
+            if game.state != "PLAY":
+                game.begin_session()
+            keys, shoot = script.next()
+            game.step(keys, shoot)
+            game.draw_play()
+    return run
+
+
+@benchmark("level_draw", 500)
+def level_draw_setup():
+    level = Level(random.Random(1))
+    screen = pygame.display.get_surface()
+    level.draw(screen)
+    rng = random.Random(2)
+
+    # кожен п'ятий кадр куля ламає цеглину
+    def run(ops):
+        for i in range(ops):
+            if i % 5 == 0:
+                level.hit_cell(rng.randrange(1, COLS - 1), rng.randrange(1, ROWS - 1))
+            level.draw(screen)
+    return run
+
+
+# Велика мапа під камерою, що щокадру зсувається на клітинку по діагоналі: домальовуються лише
+# відкриті смуги шарів, тож час залежить від розміру камери, а не мапи
+@benchmark("level_draw_large", 500)
+def level_draw_large_setup():
+    level = Level(random.Random(1), 128, 128)
+    camera = Camera()
+    screen = pygame.display.get_surface()
+    level.draw(screen, camera)
+    rng = random.Random(2)
+    span = level.cols - camera.cols
+
+    def run(ops):
+        for i in range(ops):
+            if i % 5 == 0:
+                level.hit_cell(rng.randrange(1, level.cols - 1), rng.randrange(1, level.rows - 1))
+            step = i % (2 * span)
+            camera.x = camera.y = step if step < span else 2 * span - step
+            level.draw(screen, camera)
+    return run
+
+
+@benchmark("generate_valid_level", 20)
+def generate_setup():
+    level = Level(random.Random(1))
+
+    def run(ops):
+        level.rng.seed(1)
+        for _ in range(ops):
+            level.generate_valid_level()
+    return run
+
+
+@benchmark("bfs", 2000)
+def bfs_setup():
+    level = Level(random.Random(1))
+    points = level.enemy_spawn_points
+
+    def run(ops):
+        for i in range(ops):
+            level.bfs(*points[i % len(points)])
+    return run
+
+
+def level_paths():
+    paths = []
+    for folder in ("levels", "classic_levels"):
+        folder = os.path.join(BASE_DIR, folder)
+        paths += sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".txt"))
+    return paths
+
+
+@benchmark("load_from_file", 500)
+def load_setup():
+    level = Level(random.Random(1))
+    paths = level_paths()
+
+    def run(ops):
+        for i in range(ops):
+            level.load_from_file(paths[i % len(paths)])
+    return run
+
+
+# Без кешу в пам'яті: читання скомпільованих файлів
+@benchmark("load_from_file_cold", 200)
+def load_cold_setup():
+    level = Level(random.Random(1))
+    paths = level_paths()
+
+    def run(ops):
+        for i in range(ops):
+            level_format.cache.clear()
+            level.load_from_file(paths[i % len(paths)])
+    return run
+
+
+@benchmark("colorize_surface", 50)
+def colorize_setup():
+    def run(ops):
+        for i in range(ops):
+            Enemy.colorize_surface(assets.enemy_up, (i * 37) % 360)
+    return run
+
+
+@benchmark("change_direction_smart", 5000)
+def change_direction_setup():
+    level = Level(random.Random(1))
+    player = Player(COLS // 2, ROWS - 2)
+    world = World()
+    rng = random.Random(1)
+    enemy = spawn_enemy(world, 2, 1, "BASIC", rng)
+    flow = FlowField()
+    flow.update(level, player.x, player.y)
+    free = [(x, y) for y in range(ROWS) for x in range(COLS) if level.tile_is_walkable(x, y)]
+
+    def run(ops):
+        for i in range(ops):
+            world.x[enemy], world.y[enemy] = free[i % len(free)]
+            change_direction_smart(world, enemy, level, rng, flow)
+    return run
+
+
+# Пошук цілі в клітинці серед 20 сутностей - стільки буває на мапі на HARD
+@benchmark("world_find", 20000)
+def world_find_setup():
+    world = World()
+    rng = random.Random(1)
+    for _ in range(20):
+        spawn_enemy(world, rng.randrange(COLS), rng.randrange(ROWS), "BASIC", rng)
+    cells = [(rng.randrange(COLS), rng.randrange(ROWS)) for _ in range(64)]
+
+    def run(ops):
+        for i in range(ops):
+            world.find(*cells[i % len(cells)], ENTITY_ENEMY)
+    return run
+
+
+# Гравець на одній лінії з ворогом; кожен десятий виклик стіна в рядку змінюється
+@benchmark("check_line_of_sight", 5000)
+def line_of_sight_setup():
+    level = Level(random.Random(1))
+    player = Player(COLS // 2, ROWS - 2)
+    world = World()
+    spawn_enemy(world, 2, ROWS - 2, "SNIPER", random.Random(1))
+    enemies = world.indices(ENTITY_ENEMY)
+    rng = random.Random(2)
+
+    def run(ops):
+        for i in range(ops):
+            if i % 10 == 0:
+                level.hit_cell(rng.randrange(1, COLS - 1), ROWS - 2)
+            world.direction[enemies] = DIRECTION_CODES["UP"]
+            check_line_of_sight(world, enemies, level, player, rng)
+    return run
+
+
+# Стрес для системи ворогів: 2000 танків на мапі 128x128, операція - один тік системи
+@benchmark("update_enemies_2000", 200)
+def update_enemies_setup():
+    level = Level(random.Random(1), 128, 128)
+    world = World()
+    rng = random.Random(1)
+    player = Player(level.cols // 2, level.rows - 2)
+    flow = FlowField()
+    flow.update(level, player.x, player.y)
+    bullets = BulletStore(cols=level.cols, rows=level.rows)
+
+    free = [(x, y) for y in range(level.rows) for x in range(level.cols) if level.tile_is_walkable(x, y)]
+    for x, y in rng.sample(free, 2000):
+        spawn_enemy(world, x, y, rng.choice(("BASIC", "FAST", "ARMOR", "SNIPER")), rng)
+
+    def run(ops):
+        for _ in range(ops):
+            update_enemies(world, level, bullets, player, rng, flow)
+            bullets.clear()
+    return run
+
+
+# Повний перерахунок карти: ціль щоразу в новій клітинці
+@benchmark("flow_field_rebuild", 500)
+def flow_field_setup():
+    level = Level(random.Random(1))
+    flow = FlowField()
+    free = [(x, y) for y in range(ROWS) for x in range(COLS) if level.tile_is_walkable(x, y)]
+
+    def run(ops):
+        for i in range(ops):
+            flow.update(level, *free[i % len(free)])
+            flow.distance(0, 0)
+    return run
+
+
+# Один крок 16 ігор разом: випадкові дії, спостереження в заздалегідь виділені масиви
+@benchmark("vec_env_step_16", 200)
+def vec_env_step_setup():
+    from vec_env import VecEnv
+
+    env = VecEnv(16, "ARCADE", seed=1)
+    env.reset()
+    rng = np.random.default_rng(1)
+    moves = np.zeros(env.num_envs, dtype=np.int64)
+    fire = np.zeros(env.num_envs, dtype=bool)
+
+    def run(ops):
+        for _ in range(ops):
+            moves[:] = rng.integers(-1, 4, env.num_envs)
+            fire[:] = rng.random(env.num_envs) < 0.2
+            env.step(moves, fire)
+    return run
+
+
+# Прогін: warmup + repeat замірів по ops операцій; результат - секунди на операцію
+def measure(name, repeat):
+    setup, ops = benchmarks[name]
+    run = setup()
+    run(max(1, ops // 10))
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(ops)
+        times.append((time.perf_counter() - start) / ops)
+
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "median": statistics.median(times),
+        "min": min(times),
+        "mean": statistics.fmean(times),
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    print(f"{'Бенчмарк':<28}{'база, мкс':>12}{'зараз, мкс':>12}{'зміна':>9}")
+
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<28}{'-':>12}{result['median'] * 1e6:>12.1f}")
+            continue
+
+        change = result["median"] / base["median"] - 1
+        mark = ""
+        if change > threshold:
+            mark = "  РЕГРЕСІЯ"
+            regressions.append(name)
+
+        print(f"{name:<28}{base['median'] * 1e6:>12.1f}{result['median'] * 1e6:>12.1f}{change:>+9.1%}{mark}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки гарячих місць гри")
+    parser.add_argument("names", nargs="*", help="які бенчмарки запускати (за замовчуванням - усі)")
+    parser.add_argument("--repeat", type=int, default=5, help="скільки замірів на бенчмарк")
+    parser.add_argument("--output", metavar="FILE", help="записати результати в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="порівняти з базовим JSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="відносне сповільнення, яке вважається регресією")
+    parser.add_argument("--list", action="store_true", help="показати список бенчмарків")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(benchmarks))
+        return 0
+
+    names = args.names or list(benchmarks)
+    unknown = [name for name in names if name not in benchmarks]
+    if unknown:
+        parser.error(f"невідомі бенчмарки: {', '.join(unknown)}")
+
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # Сейв та історія матчів - у тимчасовій папці, щоб не чіпати профіль гравця
+    workdir = tempfile.mkdtemp(prefix="bc_bench_")
+    for folder in ("levels", "classic_levels"):
+        os.symlink(os.path.join(BASE_DIR, folder), os.path.join(workdir, folder))
+    os.chdir(workdir)
+
+    # вікно і ассети потрібні бенчмаркам малювання і перефарбування
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    assets.load_assets()
+
+    results = {}
+    for name in names:
+        results[name] = measure(name, args.repeat)
+        print(f"{name:<28}{results[name]['median'] * 1e6:>12.1f} мкс/оп")
+
+    save_manager.close()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Регресії: {', '.join(regressions)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,23 @@
 # bonus.py
-from settings import TILE, FPS
+from settings import FPS
 import assets
+from world import ENTITY_BONUS
 
-class Bonus:
-    def __init__(self, x, y, bonus_type):
-        self.x = x 
-        self.y = y
-        self.type = bonus_type
-        self.timer = FPS * 5 # бонус зникає через 5 секунд, якщо не підібрати 
-        self.image = assets.bonus_images[bonus_type]
+BONUS_TYPES = assets.BONUS_TYPES
+BONUS_CODES = {name: code for code, name in enumerate(BONUS_TYPES)}
 
-    def draw(self, screen):
-        screen.blit(self.image, (self.x * TILE, self.y * TILE))
\ No newline at end of file
+BONUS_TIME = FPS * 5 # бонус зникає через 5 секунд, якщо не підібрати
+
+
+def spawn_bonus(world, x, y, bonus_type):
+    i = world.spawn(ENTITY_BONUS, x, y, BONUS_CODES[bonus_type])
+    world.lifetime[i] = BONUS_TIME
+    return i
+
+
+def bonus_name(world, i):
+    return BONUS_TYPES[world.type[i]]
+
+
+def draw_bonuses(world, screen, camera=None):
+    return world.draw(screen, ENTITY_BONUS, lambda i: assets.bonus_images[bonus_name(world, i)], camera)
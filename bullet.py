@@ -1,73 +1,179 @@
-# bullet.py
+import numpy as np
 import pygame
-from settings import TILE, BULLET_COLOR, BULLET_SPEED, COLS, ROWS
+from settings import TILE, BULLET_SPEED, COLS, ROWS
 import assets
 
-class Bullet:
-    def __init__(self, cell_x, cell_y, direction, is_enemy=False):
-        
-        self.x = int(cell_x)
-        self.y = int(cell_y)
-        self.direction = direction
-        self.is_enemy = is_enemy
-        self.active = True
-
-    def update(self, level, player):
-        if not self.active:
-            return
+PLAYER = 0
+ENEMY = 1
+
+DIRECTION_VECTORS = {
+    "UP":    (0, -1),
+    "DOWN":  (0,  1),
+    "LEFT":  (-1, 0),
+    "RIGHT": (1,  0),
+}
+
+
+FIELDS = ("x", "y", "dx", "dy", "owner", "active", "cell_id")
+
+
+# Усі кулі в масивах NumPy (x, y, dx, dy, owner, active):
+# рух, вихід за межі і стиснення списку - однією операцією на всі кулі.
+# dx, dy - зсув за тік (±BULLET_SPEED), cell_id - номер клітинки y * cols + x після руху
+class BulletStore:
+    def __init__(self, capacity=64, cols=COLS, rows=ROWS):
+        self.count = 0
+        self.cols = cols
+        self.rows = rows
+        self.x = np.zeros(capacity, dtype=np.float64)
+        self.y = np.zeros(capacity, dtype=np.float64)
+        self.dx = np.zeros(capacity, dtype=np.float64)
+        self.dy = np.zeros(capacity, dtype=np.float64)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.cell_id = np.zeros(capacity, dtype=np.int64)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
 
-        if self.direction == "UP":
-            self.y -= BULLET_SPEED
-        elif self.direction == "DOWN":
-            self.y += BULLET_SPEED
-        elif self.direction == "LEFT":
-            self.x -= BULLET_SPEED
-        elif self.direction == "RIGHT":
-            self.x += BULLET_SPEED
-
-        if self.x < 0 or self.x >= COLS or self.y < 0 or self.y >= ROWS:
-            self.active = False
+    # Розмір мапи, за межами якої кулі зникають
+    def resize(self, cols, rows):
+        self.clear()
+        self.cols = cols
+        self.rows = rows
+
+    def grow(self):
+        capacity = len(self.x) * 2
+        for name in FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, cell_x, cell_y, direction, is_enemy=False):
+        if self.count == len(self.x):
+            self.grow()
+
+        i = self.count
+        dx, dy = DIRECTION_VECTORS[direction]
+        self.x[i] = int(cell_x)
+        self.y[i] = int(cell_y)
+        self.dx[i] = dx * BULLET_SPEED
+        self.dy[i] = dy * BULLET_SPEED
+        self.owner[i] = ENEMY if is_enemy else PLAYER
+        self.active[i] = True
+        self.cell_id[i] = int(cell_y) * self.cols + int(cell_x)
+        self.count += 1
+        return i
+
+    # Прибирає неактивні кулі зі збереженням порядку
+    def compact(self):
+        n = self.count
+        keep = self.active[:n].copy()
+        alive = int(np.count_nonzero(keep))
+        if alive == n:
             return
 
-        if level.hit_cell(int(self.x), int(self.y)):
-            self.active = False
-
-        if self.is_enemy:
-            player_x, player_y = player.get_grid_pos()
-            if int(self.x) == player_x and int(self.y) == player_y:
-                did_damage = player.take_damage()
-                self.active = False
-                return did_damage
-    
-    def check_base_collision(self, base):
-        if not self.active:
-            return False
-            
-        if not self.is_enemy:
-            return False
-            
-        bullet_x = int(self.x)
-        bullet_y = int(self.y)
-        
-        if bullet_x == base.x and bullet_y == base.y:
-            base.destroy()
-            self.active = False
-            return True
-            
-        return False
-
-    def draw(self, screen):
-        if not self.active:
+        for name in FIELDS:
+            arr = getattr(self, name)
+            arr[:alive] = arr[:n][keep]
+        self.count = alive
+
+    def update(self, level):
+        self.compact()
+        n = self.count
+        if n == 0:
             return
 
-        if self.direction in ("UP", "DOWN"):
-            img = assets.bullet_vertical
-        else:  
-            img = assets.bullet_horizontal
+        x = self.x[:n]
+        y = self.y[:n]
+        active = self.active[:n]
+
+        x += self.dx[:n]
+        y += self.dy[:n]
+
+        active &= (x >= 0) & (x < self.cols) & (y >= 0) & (y < self.rows)
 
-        if img is None:
+        cell_id = self.cell_id[:n]
+        np.add(y.astype(np.int64) * self.cols, x.astype(np.int64), out=cell_id)
+
+        idx = active.nonzero()[0]
+        if len(idx):
+            active[idx[level.hit_cells(cell_id[idx])]] = False
+
+    def indices(self, owner):
+        n = self.count
+        mask = self.owner[:n] == owner
+        mask &= self.active[:n]
+        return mask.nonzero()[0]
+
+    # Індекси активних куль owner у клітинці (cell_x, cell_y)
+    def hits_at(self, cell_x, cell_y, owner):
+        n = self.count
+        if n == 0:
+            return ()
+
+        mask = self.cell_id[:n] == cell_y * self.cols + cell_x
+        mask &= self.active[:n]
+        mask &= self.owner[:n] == owner
+        return mask.nonzero()[0]
+
+    def has_active(self, owner):
+        n = self.count
+        mask = self.owner[:n] == owner
+        mask &= self.active[:n]
+        return bool(mask.any())
+
+    def cell(self, i):
+        return int(self.x[i]), int(self.y[i])
+
+    def direction(self, i):
+        if self.dy[i] < 0:
+            return "UP"
+        if self.dy[i] > 0:
+            return "DOWN"
+        if self.dx[i] < 0:
+            return "LEFT"
+        return "RIGHT"
+
+    def get_state(self):
+        return [
+            (float(self.x[i]), float(self.y[i]), self.direction(i), bool(self.owner[i] == ENEMY))
+            for i in self.active[:self.count].nonzero()[0]
+        ]
+
+    # Індекси активних куль, які видно камері (без камери - усі)
+    def visible(self, camera=None):
+        idx = self.active[:self.count].nonzero()[0]
+        if camera is None:
+            return idx
+
+        x = self.x[idx]
+        y = self.y[idx]
+        mask = (x > camera.x - 1) & (x < camera.x + camera.cols) & (y > camera.y - 1) & (y < camera.y + camera.rows)
+        return idx[mask]
+
+    # Прямокутники на екрані: світові координати мінус зсув камери
+    def rects(self, camera=None):
+        ox, oy = camera.offset if camera else (0, 0)
+        return [
+            pygame.Rect(int(self.x[i] * TILE) - ox, int(self.y[i] * TILE) - oy, TILE, TILE)
+            for i in self.visible(camera)
+        ]
+
+    def draw(self, screen, camera=None):
+        if assets.bullet_vertical is None:
             return
 
-        px = self.x * TILE
-        py = self.y * TILE
-        screen.blit(img, (px, py))
+        ox, oy = camera.offset if camera else (0, 0)
+        for i in self.visible(camera):
+            if self.dy[i]:
+                img = assets.bullet_vertical
+            else:
+                img = assets.bullet_horizontal
+
+            screen.blit(img, (self.x[i] * TILE - ox, self.y[i] * TILE - oy))
+
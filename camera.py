@@ -0,0 +1,32 @@
+from settings import TILE, VIEW_COLS, VIEW_ROWS
+
+
+# Видима частина мапи: лівий верхній кут (x, y) у клітинках і розмір у клітинках.
+# Тримає гравця посередині, але не виходить за краї мапи
+class Camera:
+    def __init__(self, cols=VIEW_COLS, rows=VIEW_ROWS):
+        self.cols = cols
+        self.rows = rows
+        self.x = 0
+        self.y = 0
+
+    # Повертає True, якщо камера зрушила
+    def follow(self, target_x, target_y, map_cols, map_rows):
+        x = min(max(target_x - self.cols // 2, 0), max(map_cols - self.cols, 0))
+        y = min(max(target_y - self.rows // 2, 0), max(map_rows - self.rows, 0))
+
+        if x == self.x and y == self.y:
+            return False
+
+        self.x = x
+        self.y = y
+        return True
+
+    # Зсув у пікселях: екранна позиція = світова - offset
+    @property
+    def offset(self):
+        return self.x * TILE, self.y * TILE
+
+    # Чи видно хоч частину клітинки (x, y); x, y можуть бути дробовими (кулі)
+    def visible(self, x, y):
+        return self.x - 1 < x < self.x + self.cols and self.y - 1 < y < self.y + self.rows
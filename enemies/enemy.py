@@ -1,38 +1,48 @@
 # enemy.py
+import os
+import hashlib
 import pygame
-import random
-from settings import TILE, ENEMY_TYPES
+import numpy as np
+from settings import ENEMY_TYPES
+from flow_field import UNREACHABLE, DIRECTIONS as FLOW_DIRECTIONS
+from world import ENTITY_ENEMY, DIRECTION_NAMES, DIRECTION_CODES, DX, DY
 import assets
 
-from bullet import Bullet
+# Базові ваги випадкового вибору напрямку і бонус за крок до цілі
+DIRECTION_WEIGHTS = {"UP": 5, "DOWN": 20, "LEFT": 15, "RIGHT": 15}
+PURSUIT_WEIGHT = 30
 
-class Enemy:
-    _sprite_cache = {}
+# На скільки клітинок бачать гравця всі, крім снайпера
+SIGHT_RANGE = 6
 
-    def __init__(self, cell_x, cell_y, enemy_type="BASIC"):
-        self.x = cell_x
-        self.y = cell_y
-        self.type = enemy_type
-        self.invincible = 0
-        
-        stats = ENEMY_TYPES.get(enemy_type, ENEMY_TYPES["BASIC"])
-        
-        self.speed_delay = stats["speed"]
-        self.hp = stats["hp"]
-        self.hue = stats.get("hue", None)
-        self.score = stats["score"]
-        
-        shoot_range = stats.get("shoot_freq", (60, 180)) # (min, max)
-        self.shoot_min, self.shoot_max = shoot_range
+# Скільки тіків ворог блимає після влучання, що його не вбило
+HIT_INVINCIBLE = 10
 
-        self.direction = "DOWN"
-        
-        self.move_timer = self.speed_delay
-        self.shoot_timer = random.randint(self.shoot_min, self.shoot_max)
+SPRITE_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "sprites")
+
+# Характеристики типів за кодом типу (рядок type у світі)
+ENEMY_TYPE_NAMES = tuple(ENEMY_TYPES)
+ENEMY_TYPE_CODES = {name: code for code, name in enumerate(ENEMY_TYPE_NAMES)}
+SNIPER = ENEMY_TYPE_CODES["SNIPER"]
+
+
+# Перебудовує таблиці характеристик з types (ті самі типи, що в ENEMY_TYPES, інші значення) -
+# так batch_sim перевіряє баланс без правок settings.py
+def load_enemy_types(types):
+    global SPEED, HP, HUE, SHOOT_FREQ
+    stats = [types[name] for name in ENEMY_TYPE_NAMES]
+    SPEED = np.array([s["speed"] for s in stats], dtype=np.float64)
+    HP = tuple(s["hp"] for s in stats)
+    HUE = tuple(s.get("hue", None) for s in stats)
+    SHOOT_FREQ = tuple(s.get("shoot_freq", (60, 180)) for s in stats) # (min, max)
 
-        self.alive = True
 
-        self.sprites = self.get_sprites_for_type(enemy_type, self.hue)
+load_enemy_types(ENEMY_TYPES)
+
+
+# Спрайти ворогів: перефарбовані за hue типу, спільні для всіх танків одного типу
+class Enemy:
+    _sprite_cache = {}
 
     @classmethod
     def get_sprites_for_type(cls, enemy_type, hue):
@@ -42,9 +52,10 @@ class Enemy:
         if cache_key in cls._sprite_cache:
             return cls._sprite_cache[cache_key]
 
-        # Якщо в кеші немає - генеруємо
-        print(f"Generating sprites for {cache_key}...") # Для відладки
-        
+        # ассети не завантажені (headless) - малювати нічого, кешувати теж
+        if assets.enemy_up is None:
+            return {}
+
         original_sprites = {
             "UP": assets.enemy_up,
             "DOWN": assets.enemy_down,
@@ -57,9 +68,7 @@ class Enemy:
             if img is None: continue
             
             if hue is not None:
-                # Викликаємо функцію зміни HUE
-                new_img = cls.colorize_surface(img, hue)
-                generated[direction] = new_img
+                generated[direction] = cls.load_colorized(img, hue)
             else:
                 generated[direction] = img
         
@@ -67,184 +76,228 @@ class Enemy:
         cls._sprite_cache[cache_key] = generated
         return generated
 
+    # Генеруємо спрайти всіх типів одразу після завантаження ассетів,
+    # щоб під час гри нічого не перефарбовувалось
+    @classmethod
+    def prewarm_sprites(cls):
+        for enemy_type, stats in ENEMY_TYPES.items():
+            cls.get_sprites_for_type(enemy_type, stats.get("hue", None))
+
+    # Перефарбований спрайт з дискового кешу; ключ - хеш пікселів оригіналу і hue
+    @classmethod
+    def load_colorized(cls, surface, hue):
+        digest = hashlib.sha1(pygame.image.tobytes(surface, "RGBA")).hexdigest()[:16]
+        width, height = surface.get_size()
+        path = os.path.join(SPRITE_CACHE_DIR, f"{digest}_{width}x{height}_{hue}.png")
+
+        if os.path.exists(path):
+            try:
+                image = pygame.image.load(path)
+                if pygame.display.get_surface():
+                    image = image.convert_alpha()
+                return image
+            except pygame.error:
+                pass
+
+        new_surface = cls.colorize_surface(surface, hue)
+
+        try:
+            os.makedirs(SPRITE_CACHE_DIR, exist_ok=True)
+            pygame.image.save(new_surface, path)
+        except (OSError, pygame.error) as e:
+            print(f"Не вдалося зберегти спрайт у кеш: {e}")
+
+        return new_surface
+
     @staticmethod
     def colorize_surface(surface, target_hue):
         # Створюємо копію, щоб не псувати оригінал
         new_surface = surface.copy()
-        
-        # PixelArray дозволяє редагувати пікселі як 2D масив
-        pixels = pygame.PixelArray(new_surface)
-        
-        # Проходимо по кожному пікселю (для 32x32 це швидко, ~1024 ітерації)
-        for x in range(new_surface.get_width()):
-            for y in range(new_surface.get_height()):
-                # Отримуємо колір у форматі (r, g, b, a)
-                raw_color = new_surface.unmap_rgb(pixels[x, y])
-                
-                # Якщо піксель повністю прозорий - пропускаємо
-                if raw_color.a == 0:
-                    continue
-                
-                # Конвертуємо в об'єкт pygame.Color для доступу до HSLA
-                color = pygame.Color(raw_color.r, raw_color.g, raw_color.b, raw_color.a)
-                
-                # Отримуємо поточні (Hue, Saturation, Lightness, Alpha)
-                h, s, l, a = color.hsla
-                
-                # Міняємо тільки Hue (від 0 до 360)
-                # s (насиченість) і l (світлота) залишаються старими -> тіні зберігаються!
-                color.hsla = (target_hue, s, l, a)
-                
-                # Записуємо назад
-                pixels[x, y] = color
-        
-        # Обов'язково закриваємо PixelArray
-        pixels.close()
+        if not new_surface.get_flags() & pygame.SRCALPHA:
+            new_surface = new_surface.convert_alpha()
+
+        # Заміна Hue в HSL при тих самих s і l зберігає хрому (max - min) і мінімум каналу,
+        # тож новий колір = min + хрома, розкладена за сектором target_hue
+        rgb = pygame.surfarray.pixels3d(new_surface)
+        alpha = pygame.surfarray.pixels_alpha(new_surface)
+
+        pixels = rgb.astype(np.float32) / 255.0
+        c_max = pixels.max(axis=2)
+        c_min = pixels.min(axis=2)
+        chroma = c_max - c_min
+
+        sector = (target_hue % 360) / 60.0
+        second = chroma * (1 - abs(sector % 2 - 1))
+
+        channels = [
+            (chroma, second, 0), (second, chroma, 0), (0, chroma, second),
+            (0, second, chroma), (second, 0, chroma), (chroma, 0, second),
+        ][int(sector) % 6]
+
+        result = np.empty_like(pixels)
+        for i, value in enumerate(channels):
+            result[..., i] = c_min + value
+
+        # Повністю прозорі пікселі не чіпаємо
+        visible = alpha > 0
+        rgb[visible] = np.round(result[visible] * 255.0).astype(np.uint8)
+
+        del rgb
+        del alpha
         return new_surface
 
-    def get_grid_pos(self):
-        return self.x, self.y
 
-    def take_damage(self):
-        self.hp -= 1
+# Новий ворожий танк у світі; невідомий тип - як BASIC
+def spawn_enemy(world, cell_x, cell_y, enemy_type, rng):
+    code = ENEMY_TYPE_CODES.get(enemy_type, ENEMY_TYPE_CODES["BASIC"])
+    i = world.spawn(ENTITY_ENEMY, cell_x, cell_y, code)
+    world.hp[i] = HP[code]
+    world.direction[i] = DIRECTION_CODES["DOWN"]
+    world.move_timer[i] = SPEED[code]
+    world.shoot_timer[i] = rng.randint(*SHOOT_FREQ[code])
+    return i
 
-        if self.hp <= 0:
-            self.alive = False
-            return True
-        
-        self.invincible = 10
-        return False
 
-    def update(self, level, bullets, player):
-        if self.invincible > 0:
-            self.invincible -= 1
+def enemy_name(world, i):
+    return ENEMY_TYPE_NAMES[world.type[i]]
 
-        if not self.alive:
-            return
 
-        self.check_line_of_sight(player, bullets)
+# Повертає True, якщо ворог загинув
+def damage_enemy(world, i):
+    world.hp[i] -= 1
 
-        self.shoot_timer -= 1
+    if world.hp[i] <= 0:
+        world.alive[i] = False
+        return True
 
-        if self.shoot_timer <= 0:
-            self.shoot(bullets)
-            self.shoot_timer = random.randint(self.shoot_min, self.shoot_max)
+    world.invincible[i] = HIT_INVINCIBLE
+    return False
 
-        # Якщо лічильник ще не закінчився - ворог не може рухатися
-        if self.move_timer > 0:
-            self.move_timer -= 1
-            return
-        
-        # Рух ворога
-        self.move_timer = self.speed_delay
-
-        dx = dy = 0
-
-        if self.direction == "UP":
-            dy = -1
-        elif self.direction == "DOWN":
-            dy =  1
-        elif self.direction == "LEFT":
-            dx = -1
-        elif self.direction == "RIGHT":
-            dx =  1
-
-        new_x = self.x + dx
-        new_y = self.y + dy
-    
-        if level.can_move(new_x, new_y):
-            self.x = new_x
-            self.y = new_y
-            if random.random() < 0.05:
-                 self.change_direction_smart(level, player)
+
+# Система ворогів на тік. Таймери всіх танків зменшуються масивами; рішення з RNG (поворот до гравця,
+# постріл, крок) приймаються лише для тих танків, у кого цього тіку щось сталося
+def update_enemies(world, level, bullets, player, rng, flow=None):
+    idx = world.indices(ENTITY_ENEMY)
+    if not len(idx):
+        return
+
+    invincible = world.invincible[idx]
+    world.invincible[idx] = invincible - (invincible > 0)
+
+    check_line_of_sight(world, idx, level, player, rng)
+
+    # постріли
+    shoot_timer = world.shoot_timer
+    shoot_timer[idx] -= 1
+    for i in idx[shoot_timer[idx] <= 0].tolist():
+        bullets.spawn(world.x[i], world.y[i], DIRECTION_NAMES[world.direction[i]], is_enemy=True)
+        shoot_timer[i] = rng.randint(*SHOOT_FREQ[world.type[i]])
+
+    # Якщо лічильник ще не закінчився - ворог не може рухатися
+    timers = world.move_timer[idx]
+    waiting = timers > 0
+    world.move_timer[idx[waiting]] = timers[waiting] - 1
+
+    movers = idx[~waiting]
+    if not len(movers):
+        return
+
+    world.move_timer[movers] = SPEED[world.type[movers]]
+
+    direction = world.direction[movers]
+    new_x = world.x[movers] + DX[direction]
+    new_y = world.y[movers] + DY[direction]
+    moved = level.can_move_cells(new_x, new_y)
+
+    world.move(movers[moved], new_x[moved], new_y[moved])
+
+    # якщо врізався - змінюємо напрямок, інакше іноді повертає сам
+    for i, ok in zip(movers.tolist(), moved.tolist()):
+        if not ok or rng.random() < 0.05:
+            change_direction_smart(world, i, level, rng, flow)
+
+
+# Повертає до гравця, лише якщо між ними немає стін (снайпер бачить усю лінію).
+# idx - живі вороги; на одній лінії з гравцем зазвичай лише кілька з них
+def check_line_of_sight(world, idx, level, player, rng):
+    player_x, player_y = player.get_grid_pos()
+
+    x = world.x[idx]
+    y = world.y[idx]
+    aligned = (x == player_x) | (y == player_y)
+    if not aligned.any():
+        return
+
+    for i in idx[aligned].tolist():
+        enemy_x = int(world.x[i])
+        enemy_y = int(world.y[i])
+
+        if player_x == enemy_x and player_y != enemy_y:
+            dist = player_y - enemy_y
+            needed_dir = "DOWN" if dist > 0 else "UP"
         else:
-            # якщо врізався то змінюємо напрямок
-            self.change_direction_smart(level, player)   
+            dist = player_x - enemy_x
+            needed_dir = "RIGHT" if dist > 0 else "LEFT"
 
-    def check_line_of_sight(self, player, bullets):
-        if self.type == "SNIPER":
+        if world.type[i] == SNIPER:
             reaction_chance = 0.7
         else:
             reaction_chance = 0.3
-        
-        if random.random() > reaction_chance:
-            return
+            if abs(dist) >= SIGHT_RANGE:
+                continue
 
-        player_x, player_y = player.get_grid_pos()
-        
-        needed_dir = None
-
-        needed_dir_y = self.get_direction(self.x, player_x, self.y, player_y, "UP", "DOWN")
-        needed_dir_x = self.get_direction(self.y, player_y, self.x, player_x, "LEFT", "RIGHT") 
-
-        needed_dir = needed_dir_x or needed_dir_y
-
-        if needed_dir and self.direction != needed_dir:
-            self.direction = needed_dir
-            self.move_timer = 30
-            self.shoot_timer = 30
-
-    def get_direction(self, coord_equal1, coord_equal2, coord_different1, coord_differen2, direction1, direction2):
-        if coord_equal1 == coord_equal2:
-            dist = abs(coord_different1-coord_differen2)
-            if dist < 6:
-                if coord_differen2 < coord_different1:
-                    return direction1
-                else:
-                    return direction2
-                
-
-    def change_direction_smart(self, level, player):
-        options = []
-        
-        directions = [
-            ("UP", 0, -1, 5),
-            ("DOWN", 0, 1, 20),
-            ("LEFT", -1, 0, 15),
-            ("RIGHT", 1, 0, 15)
-        ]
-        
-        (player_x, player_y) = player.get_grid_pos()
+        code = DIRECTION_CODES[needed_dir]
+        if world.direction[i] == code or not level.clear_shot(enemy_x, enemy_y, player_x, player_y):
+            continue
 
-        dist_x = abs(player_x - self.x)
-        dist_y = abs(player_y - self.y)
+        if rng.random() > reaction_chance:
+            continue
 
-        is_tracking_active = dist_y > 3 and dist_x >3
+        world.direction[i] = code
+        world.move_timer[i] = 30
+        world.shoot_timer[i] = 30
 
-        for (direction, dx, dy, weight) in directions:
-            new_x, new_y = self.x + dx, self.y + dy
-            
-            if not level.can_move(new_x, new_y):
-                continue
-            
-            if is_tracking_active:
-                if direction == "DOWN" and player_y > self.y: 
-                    weight += 30
-                if direction == "UP" and player_y < self.y: 
-                    weight += 20
-                if direction == "LEFT" and player_x < self.x: 
-                    weight += 30
-                if direction == "RIGHT" and player_x > self.x: 
-                    weight += 30
-            
-            options.append(direction)
 
-            for num in range(weight):
-                options.append(direction)
+# Зважений вибір напрямку: базові ваги + бонус за крок, що зменшує відстань у flow-карті.
+# Цеглу на шляху до цілі теж можна обрати - ворог упреться в неї і прострелить
+def change_direction_smart(world, i, level, rng, flow=None):
+    x = int(world.x[i])
+    y = int(world.y[i])
+    directions = []
+    weights = []
 
-        if options:
-            self.direction = random.choice(options)
+    current = flow.distance(x, y) if flow else UNREACHABLE
+
+    for (direction, dx, dy) in FLOW_DIRECTIONS:
+        new_x, new_y = x + dx, y + dy
+        closer = flow is not None and flow.distance(new_x, new_y) < current
+
+        if level.can_move(new_x, new_y):
+            weight = DIRECTION_WEIGHTS[direction] + 1
+            if closer:
+                weight += PURSUIT_WEIGHT
+        elif closer:
+            weight = PURSUIT_WEIGHT
         else:
-            self.direction = random.choice(["UP", "DOWN", "LEFT", "RIGHT"])
-
-    def shoot(self, bullets):
-        cell_x, cell_y = self.get_grid_pos()
-        bullet = Bullet(cell_x, cell_y, self.direction, is_enemy=True)
-        bullets.append(bullet)
-
-    def draw(self, screen):
-        img = self.sprites.get(self.direction)
-        if img:
-            if self.invincible > 0:
-                return
-            screen.blit(img, (self.x * TILE, self.y * TILE))
+            continue
+
+        directions.append(direction)
+        weights.append(weight)
+
+    if directions:
+        direction = rng.choices(directions, weights)[0]
+    else:
+        direction = rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
+    world.direction[i] = DIRECTION_CODES[direction]
+
+
+# Танк, що блимає після влучання, у цей кадр не малюється
+def draw_enemies(world, screen, camera=None):
+    def image(i):
+        if world.invincible[i] > 0:
+            return None
+        code = world.type[i]
+        sprites = Enemy.get_sprites_for_type(ENEMY_TYPE_NAMES[code], HUE[code])
+        return sprites.get(DIRECTION_NAMES[world.direction[i]])
+
+    return world.draw(screen, ENTITY_ENEMY, image, camera)
@@ -1,26 +1,19 @@
 # explosion.py
-import pygame
-from settings import TILE 
 import assets
+from world import ENTITY_EXPLOSION
 
-class Explosion:
-    def __init__(self, cell_x, cell_y):
-        self.x = cell_x
-        self.y = cell_y
+EXPLOSION_FRAMES = 20  # приблизно 2/6 секунди
 
-        self.frames = 20  # приблизно 2/6 секунди
 
-    @property
-    def rect(self):
-        return pygame.Rect(self.x * TILE, self.y * TILE, TILE, TILE)
+def spawn_explosion(world, cell_x, cell_y):
+    i = world.spawn(ENTITY_EXPLOSION, cell_x, cell_y)
+    world.lifetime[i] = EXPLOSION_FRAMES
+    return i
 
-    def update(self):
-        self.frames -= 1
 
-    def draw(self, screen):
-        screen.blit(assets.explossion, (self.x * TILE, self.y * TILE))
+def update_explosions(world):
+    world.tick_lifetime(ENTITY_EXPLOSION)
 
-    @property
-    def active(self):
-        return self.frames > 0
 
+def draw_explosions(world, screen, camera=None):
+    return world.draw(screen, ENTITY_EXPLOSION, lambda i: assets.explossion, camera)
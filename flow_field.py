@@ -0,0 +1,101 @@
+from settings import COLS, ROWS, TILE_TYPES
+from tiles import WALKABLE, DESTRUCTIBLE
+
+# Більше за будь-яку відстань на мапі будь-якого розміру
+UNREACHABLE = 1 << 30
+
+# Скільки "коштує" пройти крізь цеглу: її треба спершу прострелити
+BRICK_COST = 4
+
+# Вартість кроку в клітинку за її кодом; 0 - непрохідна
+STEP_COST = bytes(
+    1 if WALKABLE[code] else BRICK_COST if DESTRUCTIBLE[code] else 0
+    for code in range(len(TILE_TYPES))
+)
+
+DIRECTIONS = (
+    ("UP", 0, -1),
+    ("DOWN", 0, 1),
+    ("LEFT", -1, 0),
+    ("RIGHT", 1, 0),
+)
+
+
+# Карта відстаней до цілі (гравець або база) по лабіринту, спільна для всіх ворогів.
+# Застаріває лише коли ціль перейшла в іншу клітинку або змінилась сітка (level.version),
+# а перераховується при першому зверненні після цього - тіки, де ніхто не повертає, її не рахують
+class FlowField:
+    def __init__(self, cols=COLS, rows=ROWS):
+        self.level = None
+        self.target = None
+        self.version = None
+        self.stale = False
+        self.rebuilds = 0
+
+        self.resize(cols, rows)
+
+    def resize(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+        self.dist = [UNREACHABLE] * (cols * rows)
+
+        # сусіди кожної клітинки в межах поля
+        self.neighbours = []
+        for i in range(cols * rows):
+            y, x = divmod(i, cols)
+            self.neighbours.append(tuple(
+                ny * cols + nx
+                for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                if 0 <= nx < cols and 0 <= ny < rows
+            ))
+
+    # Повертає True, якщо карта застаріла
+    def update(self, level, target_x, target_y):
+        if (target_x, target_y) == self.target and level.version == self.version and level is self.level:
+            return False
+
+        if (level.cols, level.rows) != (self.cols, self.rows):
+            self.resize(level.cols, level.rows)
+
+        self.level = level
+        self.target = (target_x, target_y)
+        self.version = level.version
+        self.stale = True
+        return True
+
+    # Дейкстра від цілі з кошиками за відстанню (ваги - малі цілі числа): звичайна клітинка - 1,
+    # цегла - BRICK_COST, решта непрохідна
+    def rebuild(self, tiles, target_x, target_y):
+        neighbours = self.neighbours
+        dist = [UNREACHABLE] * len(neighbours)
+
+        start = target_y * self.cols + target_x
+        dist[start] = 0
+        buckets = [[start]]
+
+        d = 0
+        while d < len(buckets):
+            for i in buckets[d]:
+                if dist[i] != d:
+                    continue
+
+                for j in neighbours[i]:
+                    cost = STEP_COST[tiles[j]]
+                    if cost and d + cost < dist[j]:
+                        nd = dist[j] = d + cost
+                        while len(buckets) <= nd:
+                            buckets.append([])
+                        buckets[nd].append(j)
+            d += 1
+
+        self.dist = dist
+
+    def distance(self, x, y):
+        if self.stale:
+            self.stale = False
+            self.rebuild(self.level.tiles, *self.target)
+            self.rebuilds += 1
+
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            return self.dist[y * self.cols + x]
+        return UNREACHABLE
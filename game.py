@@ -1,46 +1,72 @@
 # game.py
 import sys
 import os
+import copy
+import time
+import threading
 import random
 import pygame
+from collections import Counter
 import assets
 import save_manager
+import level_format
 
-from enemies.enemy import Enemy
+from enemies.enemy import Enemy, spawn_enemy, update_enemies, damage_enemy, enemy_name, draw_enemies
 from settings import (
-    WIDTH, HEIGHT, BG_COLOR, FPS, ROWS, COLS, HUD_WIDTH,
-    HUD_TEXT_COLOR, TILE, HUD_BG_COLOR
+    WIDTH, HEIGHT, BG_COLOR, FPS, VIEW_COLS, HUD_WIDTH,
+    HUD_TEXT_COLOR, TILE, HUD_BG_COLOR, DIRTY_RECTS, LEVEL_POOL_SIZE
 )
 
 from level_builder import Level
+from tiles import TILE_EMPTY, TILE_BRICK, TILE_STEEL
 from player import Player
-from bullet import Bullet
-from explosion import Explosion
-from bonus import Bonus
+from bullet import BulletStore, PLAYER, ENEMY
+from explosion import spawn_explosion, update_explosions, draw_explosions
+from bonus import spawn_bonus, bonus_name, draw_bonuses
 from base import Base
+from world import World, ENTITY_ENEMY, ENTITY_BONUS
+from camera import Camera
+from level_pool import LevelPool
+from flow_field import FlowField
+from match_history import MatchHistory
+from profiler import FrameProfiler
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    def __init__(self, headless=False, seed=None, recorder=None, level_pool_size=None, profile_log=None,
+                 publisher=None):
+        # headless - лише ігрова логіка: без вікна, шрифтів, ассетів і обмеження FPS
+        self.headless = headless
 
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Battle City: 1337 Edition")
+        # Один потік випадкових чисел на гру: з тим самим seed і вводом гра повторюється
+        self.seed = seed
+        self.session_seed = seed
+        self.rng = random.Random(seed)
+        self.recorder = recorder
+        # shared_state.SharedStatePublisher: стан після кожного тіку для інших процесів
+        self.publisher = publisher
 
-        try:
-            pygame.display.set_icon(pygame.image.load(os.path.join(assets.ASSETS_DIR, "tank.jpg")))
-        except:
-            pass
+        if not headless:
+            pygame.init()
 
-        assets.load_assets()
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
+            pygame.display.set_caption("Battle City: 1337 Edition")
 
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Consolas", 20)
-        self.title_font = pygame.font.SysFont("Consolas", 40, bold=True)
-        self.finish_font = pygame.font.SysFont("Consolas", 30)
-        self.menu_font = pygame.font.SysFont("Consolas", 25)
+            try:
+                pygame.display.set_icon(pygame.image.load(os.path.join(assets.ASSETS_DIR, "tank.jpg")))
+            except:
+                pass
 
-        self.stats_font = pygame.font.SysFont("Consolas", 15)
+            assets.load_assets()
+            Enemy.prewarm_sprites()
+
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.SysFont("Consolas", 20)
+            self.title_font = pygame.font.SysFont("Consolas", 40, bold=True)
+            self.finish_font = pygame.font.SysFont("Consolas", 30)
+            self.menu_font = pygame.font.SysFont("Consolas", 25)
+
+            self.stats_font = pygame.font.SysFont("Consolas", 15)
 
         self.difficulty_presets = {
             "EASY": {"player_hp":1, "lives": 5, "max_enemies":5, "spawn_speed": FPS*4, "max_enemies_on_map":3},
@@ -49,7 +75,13 @@ class Game:
             "HARDCORE":   {"player_hp": 1, "lives": 1, "max_enemies": 30, "spawn_speed": FPS * 1, "max_enemies_on_map":20}
         }
 
-        self.game_data = save_manager.load_data()
+        # у headless-режимі сейв не читаємо і не змінюємо
+        if headless:
+            self.game_data = copy.deepcopy(save_manager.DEFAULT_DATA)
+            self.history = None
+        else:
+            self.game_data = save_manager.load_data()
+            self.history = MatchHistory()
 
         self.selected_difficulty = "NORMAL"
         self.game_mode = "CAMPAIGN"
@@ -66,23 +98,62 @@ class Game:
         self.DAMAGE_FLASH_DURATION = None
 
         # Створення ігрових об'єктів
-        self.level = Level()
+        self.level = Level(self.rng)
+
+        # Аркадні мапи готуються у фоні; headless генерує їх на місці (без потоків)
+        if level_pool_size is None:
+            level_pool_size = 0 if headless else LEVEL_POOL_SIZE
+        self.level_pool = LevelPool(level_pool_size)
         self.base = None
         self.player = None
-        self.enemies = []
-        self.bullets = []
-        self.explosions = []
-        self.bonuses = []
+        self.bullets = BulletStore()
+        # Вороги, вибухи і бонуси - рядки масивів-компонентів, а не окремі об'єкти
+        self.world = World()
+        self.flow_field = FlowField()
+
+        # Видима частина мапи; на мапах, більших за екран, їде за гравцем
+        self.camera = Camera()
         self.player_respawn_timer = 0
         self.shovel_timer = 0
-        
+
+        # Поточний забіг для історії матчів
+        self.run_active = False
+        self.run_ticks = 0
+        self.run_started_at = 0
+        self.run_kills = Counter()
+        self.run_bonuses = Counter()
+        self.arcade_round = 1
+        # Підсумок останнього завершеного забігу: result, cause, ticks, kills_by_type, lives
+        self.last_run = None
+
+        # Dirty rects: на екран виводимо лише змінені за кадр прямокутники
+        self.dirty_rects = DIRTY_RECTS
+        self.full_redraw = True
+        self.prev_rects = []
+        self.flash_shown = False
+        self.hud_lines = {}
+        self.hud_changed = []
+
+        # Профайлер фаз кадру (F3); None - вимкнений. profile_log - файл .csv або .jsonl для запису кадрів
+        self.profile_log = profile_log
+        self.profiler = FrameProfiler(profile_log) if profile_log else None
+
+        # Екрани між рівнями (GAME_OVER, ROUND_CLEAR): черга (текст, кадрів) і стан, у який
+        # перейти після неї. Тим часом наступний рівень готується у фоновому потоці
+        self.transition_messages = []
+        self.transition_text = None
+        self.transition_timer = 0
+        self.transition_then = None
+        self.transition_drawn = True
+        self.preload_thread = None
+        self.pending_level = None
+        # headless: не проходити перехід одразу, а зупинитись на ньому (відтворення запису,
+        # що закінчився посеред переходу)
+        self.hold_transitions = False
+
     def get_current_level(self):
-        if self.game_mode == "DEFAULT":
-            dict_key = "classic_progress"
-            self.default_level_num = self.game_data[dict_key].get(self.selected_difficulty)
-        else:
-            dict_key = "campaign_progress"
-            self.campaign_level_num = self.game_data[dict_key].get(self.selected_difficulty) 
+        self.default_level_num = self.game_data["classic_progress"].get(self.selected_difficulty)
+        self.campaign_level_num = self.game_data["campaign_progress"].get(self.selected_difficulty)
         
     # Головний цикл гри
     def run(self):
@@ -90,21 +161,161 @@ class Game:
             dt = self.clock.tick(FPS)
 
             if self.state == "MENU":
+                self.finish_run("QUIT")
+                self.finish_recording()
                 self.handle_menu_events()
                 self.draw_menu()
 
             elif self.state == "PLAY":
-                self.handle_play_events()
-                self.update_play()
+                if self.profiler:
+                    self.profiler.begin_frame()
+
+                shoot = self.handle_play_events()
+                if self.profiler:
+                    self.profiler.lap("events")
+
+                self.step(pygame.key.get_pressed(), shoot)
                 self.draw_play()
 
+                if self.profiler:
+                    self.profiler.end_frame()
+
             elif self.state == "PAUSE":
                 self.handle_pause_events()
                 self.draw_pause()
 
+            elif self.state in ("GAME_OVER", "ROUND_CLEAR"):
+                self.handle_transition_events()
+                self.update_transition()
+                self.draw_transition()
+
+        self.finish_run("QUIT")
+        self.finish_recording()
+        self.join_preload()
+        if self.profiler:
+            self.profiler.close()
+        self.level_pool.close()
+        if self.history:
+            self.history.close()
+        if self.publisher:
+            self.publisher.close()
+        save_manager.close()
         pygame.quit()
         sys.exit()
 
+    # Один тік ігрової логіки: keys - як у pygame.key.get_pressed(), shoot - натиснутий SPACE
+    def step(self, keys, shoot=False):
+        if self.state != "PLAY":
+            return
+
+        if self.recorder:
+            self.recorder.record(keys, shoot)
+
+        self.run_ticks += 1
+
+        if shoot and self.player.hp > 0:
+            self.player_shoot()
+
+        self.update_play(keys)
+
+        if self.publisher:
+            self.publisher.publish(self, self.run_ticks)
+
+    # Нова сесія з меню: перезапуск RNG, щоб сесію можна було відтворити
+    def begin_session(self):
+        if self.seed is not None:
+            self.session_seed = self.seed
+        else:
+            self.session_seed = random.randrange(2**32)
+
+        self.rng.seed(self.session_seed)
+        self.arcade_round = 1
+        self.last_run = None
+
+        # рівень, підготовлений для попередньої сесії, тут не потрібен
+        self.join_preload()
+        self.pending_level = None
+
+        if self.game_mode == "ARCADE":
+            enemy_count = self.difficulty_presets[self.selected_difficulty]["max_enemies"]
+            self.level_pool.reset(self.rng.randrange(2**32), enemy_count)
+
+        if self.recorder:
+            self.recorder.start(self)
+
+        if self.history:
+            self.history.start_game()
+
+        self.start_game()
+
+    # result - WIN, LOSS або QUIT; cause - чому програли (BASE, LIVES)
+    def finish_run(self, result, cause=None):
+        if not self.run_active:
+            return
+        self.run_active = False
+
+        self.last_run = {
+            "result": result,
+            "cause": cause,
+            "ticks": self.run_ticks,
+            "kills_by_type": dict(self.run_kills),
+            "lives": self.player.lives if self.player else 0,
+        }
+
+        if self.history is None:
+            return
+
+        if self.game_mode == "ARCADE":
+            level = self.arcade_round
+        elif self.game_mode == "DEFAULT":
+            level = self.default_level_num
+        else:
+            level = self.campaign_level_num
+
+        self.history.record(
+            mode=self.game_mode,
+            difficulty=self.selected_difficulty,
+            level=level,
+            ticks=self.run_ticks,
+            seconds=self.run_ticks / FPS,
+            result=result,
+            cause=cause,
+            kills_by_type=dict(self.run_kills),
+            bonuses=dict(self.run_bonuses),
+            started_at=self.run_started_at,
+        )
+
+    def finish_recording(self):
+        if self.recorder and self.recorder.active:
+            self.recorder.finish(self)
+
+    def get_state(self):
+        player = self.player
+        world = self.world
+
+        return {
+            "state": self.state,
+            "player": {
+                "x": player.x,
+                "y": player.y,
+                "direction": player.direction,
+                "hp": player.hp,
+                "lives": player.lives,
+            },
+            "enemies": [
+                (int(world.x[i]), int(world.y[i]), enemy_name(world, i), int(world.hp[i]))
+                for i in world.indices(ENTITY_ENEMY).tolist()
+            ],
+            "bullets": self.bullets.get_state(),
+            "bonuses": [
+                (int(world.x[i]), int(world.y[i]), bonus_name(world, i))
+                for i in world.indices(ENTITY_BONUS).tolist()
+            ],
+            "base_alive": self.base.alive if self.base else None,
+            "enemy_counter": self.enemy_counter,
+            "enemies_in_queue": len(self.level_enemy_queue),
+        }
+
     # Menu-events
     def handle_menu_events(self):
         for event in pygame.event.get():
@@ -122,13 +333,14 @@ class Game:
                 if event.key in (pygame.K_a, pygame.K_c, pygame.K_d, pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4):
                     self.get_current_level()
 
-                elif event.key == pygame.K_RETURN: self.start_game()
+                elif event.key == pygame.K_RETURN: self.begin_session()
                 elif event.key == pygame.K_ESCAPE: self.running = False
 
     def handle_pause_events(self):
         for event in pygame.event.get():            
             if event.type == pygame.KEYDOWN:
                 self.state = "PLAY"
+                self.full_redraw = True
 
     def draw_menu(self):
         self.screen.fill((20, 20, 20))
@@ -170,8 +382,8 @@ class Game:
             self.draw_text_centered("Аркада: Випадкова генерація. Виживайте якнайдовше", HEIGHT - 90, (150, 255, 255))
             self.draw_text_centered("Аркада: Безкінечна війна", HEIGHT - 60, (0, 255, 255))
 
-        # Загальна статистика
-        stats = self.game_data["stats"]
+        # Загальна статистика - лічильники історії матчів, які тримаються в пам'яті
+        stats = self.history.totals
         stat_text = f"Ігор: {stats['total_games']} | Вбито: {stats['total_kills']} | Смертей: {stats['deaths']}"
         stat_surf = self.stats_font.render(stat_text, True, (80, 80, 80))
         self.screen.blit(stat_surf, (10, HEIGHT - 20))
@@ -185,16 +397,15 @@ class Game:
 
     # Game-events
     def start_game(self):
-        save_manager.add_stats(games=1)
-        self.game_data = save_manager.load_data()
         self.apply_difficulty_settings()
         self.level_enemy_queue = []
 
         if self.game_mode == "ARCADE":
-            self.level.generate_valid_level()
-            for num in range(self.MAX_ENEMIES_PER_LEVEL):
-                t = random.choice(["BASIC", "FAST", "ARMOR", "SNIPER"])
-                self.level_enemy_queue.append(t)
+            if self.pending_level:
+                tiles, cols, rows, self.level_enemy_queue = self.pending_level
+            else:
+                tiles, cols, rows, self.level_enemy_queue = self.level_pool.take()
+            self.level.load_tiles(tiles, cols, rows)
         
         elif self.game_mode == "DEFAULT":
             path = f"classic_levels/level_{self.default_level_num}.txt"
@@ -217,8 +428,10 @@ class Game:
 
             self.MAX_ENEMIES_PER_LEVEL = len(self.level_enemy_queue)
 
+        self.pending_level = None
         self.reset_entities()
         self.state = "PLAY"
+        self.full_redraw = True
 
     def apply_difficulty_settings(self):
         settings = self.difficulty_presets[self.selected_difficulty]
@@ -231,53 +444,72 @@ class Game:
         self.initial_player_hp = settings["player_hp"]
         
     def reset_entities(self):
+        level = self.level
+
         if self.game_mode == "DEFAULT":
-            base_x = 8
-            base_y = ROWS - 2
+            base_x = level.cols // 2
+            base_y = level.rows - 2
             self.base = Base(base_x, base_y)
 
             spawn_x = base_x - 2 
 
         else:   
             self.base = None 
-            spawn_x = COLS // 2 
+            spawn_x = level.cols // 2 
 
-        spawn_y = ROWS - 2 
+        spawn_y = level.rows - 2 
 
         self.player = Player(spawn_x, spawn_y, lives=self.initial_player_lives)
         self.player.hp = self.initial_player_hp 
 
-        if 0 <= spawn_y < ROWS and 0 <= spawn_x < COLS:
-            self.level.grid[spawn_y][spawn_x] = 0
+        if 0 <= spawn_y < level.rows and 0 <= spawn_x < level.cols:
+            self.level.set_tile(spawn_x, spawn_y, TILE_EMPTY)
 
-        self.enemies = []
-        self.bullets = []
-        self.player_bullet = None
-        self.explosions = []
-        self.bonuses = []
+        self.world.clear()
+        self.bullets.resize(level.cols, level.rows)
+
+        self.camera.follow(spawn_x, spawn_y, level.cols, level.rows)
 
         self.enemy_counter = 0
-        self.spawned_enemies = len(self.enemies)
+        self.spawned_enemies = 0
         self.enemy_spawn_timer = 0
         self.damage_flash_timer = 0
         self.DAMAGE_FLASH_DURATION = FPS / 4
 
-        self.showel_timer = 0
+        self.shovel_timer = 0
 
+        self.run_active = True
+        self.run_ticks = 0
+        self.run_started_at = time.time()
+        self.run_kills = Counter()
+        self.run_bonuses = Counter()
+
+    # повертає True, якщо за цей кадр натиснули SPACE
     def handle_play_events(self):
+        shoot = False
+
         for event in pygame.event.get():
             if event.type == pygame.QUIT: self.running = False
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE: 
-                    if self.player.hp > 0: self.player_shoot()
+                if event.key == pygame.K_SPACE: shoot = True
                 elif event.key == pygame.K_ESCAPE: self.state = "MENU"
                 elif event.key == pygame.K_p: self.state = "PAUSE"
+                elif event.key == pygame.K_F3: self.toggle_profiler()
+
+        return shoot
+
+    def toggle_profiler(self):
+        if self.profiler:
+            self.profiler.close()
+            self.profiler = None
+        else:
+            self.profiler = FrameProfiler(self.profile_log)
+        self.full_redraw = True
 
     def player_shoot(self):
-        if self.player_bullet is None or not self.player_bullet.active:
+        if not self.bullets.has_active(PLAYER):
             cell_x, cell_y = self.player.get_grid_pos()
-            self.player_bullet = Bullet(cell_x, cell_y, self.player.direction, is_enemy=False)
-            self.bullets.append(self.player_bullet)
+            self.bullets.spawn(cell_x, cell_y, self.player.direction, is_enemy=False)
             
     def set_base_protection(self, tile_type):
         if not self.base:
@@ -295,41 +527,54 @@ class Game:
         ]
 
         for x, y in positions:
-            if 0 <= x < COLS and 0 <= y < ROWS:
-                self.level.grid[y][x] = tile_type
+            if 0 <= x < self.level.cols and 0 <= y < self.level.rows:
+                self.level.set_tile(x, y, tile_type)
+
+    def update_play(self, keys=None):
+        profiler = self.profiler
+
+        # Вороги йдуть до бази в класиці, в інших режимах - до гравця
+        if self.game_mode == "DEFAULT" and self.base:
+            self.flow_field.update(self.level, self.base.x, self.base.y)
+        else:
+            self.flow_field.update(self.level, *self.player.get_grid_pos())
 
-    def update_play(self):
-        for enemy in self.enemies:
-            enemy.update(self.level, self.bullets, self.player)
+        update_enemies(self.world, self.level, self.bullets, self.player, self.rng, self.flow_field)
+        if profiler:
+            profiler.lap("enemies")
 
         self.update_enemy_spawning()
+        if profiler:
+            profiler.lap("spawning")
 
         self.update_bullets()
+        if profiler:
+            profiler.lap("bullets")
 
         self.try_hit_enemy()
+        if profiler:
+            profiler.lap("hits")
 
-        for explosion in self.explosions:
-            explosion.update()
-        self.explosions = [e for e in self.explosions if e.active]
+        update_explosions(self.world)
 
-        keys = pygame.key.get_pressed()
+        if keys is None:
+            keys = pygame.key.get_pressed()
         self.player.update()
         self.player.handle_input(keys, self.level)
+        if profiler:
+            profiler.lap("player")
 
-        for bonus in self.bonuses:
-            bonus.timer -=1
-
-            if not bonus.timer:
-                self.bonuses.remove(bonus)
-            if self.player.x == bonus.x and self.player.y == bonus.y:
-                self.apply_bonus(bonus.type, self.player)
-                self.bonuses.remove(bonus)
+        self.update_bonuses()
 
         if self.shovel_timer > 0:
             self.shovel_timer -= 1
 
             if self.shovel_timer == 0:
-                self.set_base_protection(1)
+                self.set_base_protection(TILE_BRICK)
+        # загиблі за тік сутності прибираються одним стисненням
+        self.world.compact()
+        if profiler:
+            profiler.lap("bonuses")
 
         # game over
         if self.player.hp <= 0:
@@ -337,23 +582,26 @@ class Game:
                 self.player_respawn_timer -= 1
             else:
                 if self.player.lives > 0:
-                    self.player.respawn() 
+                    self.player.respawn()
                 else:
-                    self.draw_game_over() 
+                    self.game_over()
         
         # win
         if self.enemy_counter >= self.MAX_ENEMIES_PER_LEVEL:
             self.handle_level_completion()  
 
+        if profiler:
+            profiler.lap("transitions")
+
     def update_enemy_spawning(self):
         self.enemy_spawn_timer -= 1
 
         if (self.enemy_spawn_timer <= 0 
-            and len(self.enemies) < self.MAX_ENEMIES_ON_SCREEN 
+            and self.world.count_of(ENTITY_ENEMY) < self.MAX_ENEMIES_ON_SCREEN 
             and len(self.level_enemy_queue) > 0):
 
             spawn_points = self.level.enemy_spawn_points[:]
-            random.shuffle(spawn_points)
+            self.rng.shuffle(spawn_points)
 
             for spawn_x, spawn_y in spawn_points:
                 if not self.level.can_move(spawn_x, spawn_y):
@@ -361,94 +609,101 @@ class Game:
                 
                 next_enemy_type = self.level_enemy_queue.pop(0)
                 
-                self.enemies.append(Enemy(spawn_x, spawn_y, next_enemy_type))
+                spawn_enemy(self.world, spawn_x, spawn_y, next_enemy_type, self.rng)
                 self.spawned_enemies += 1
                 break
 
             self.enemy_spawn_timer = self.ENEMY_SPAWN_INTERVAL
 
     def update_bullets(self):
-        for bullet in self.bullets:
-            did_die = bullet.update(self.level, self.player)
-            
-            if did_die:
-                self.damage_flash_timer = self.DAMAGE_FLASH_DURATION
+        self.bullets.update(self.level)
 
-            if self.game_mode == "DEFAULT" and self.base and self.base.alive:
-                if bullet.check_base_collision(self.base):
-                    self.explosions.append(Explosion(self.base.x, self.base.y))
-                    self.draw_game_over()
-                    return
+        # гравець і база - по одній клітинці, тож перевіряємо всі ворожі кулі разом
+        for i in self.bullets.hits_at(self.player.x, self.player.y, ENEMY):
+            self.bullets.active[i] = False
+            if self.player.take_damage():
+                self.damage_flash_timer = self.DAMAGE_FLASH_DURATION
 
-        self.bullets = [b for b in self.bullets if b.active]
+        if self.base and self.base.alive:
+            hits = self.bullets.hits_at(self.base.x, self.base.y, ENEMY)
+            if len(hits):
+                self.bullets.active[hits] = False
+                self.base.destroy()
+                spawn_explosion(self.world, self.base.x, self.base.y)
+                self.game_over()
 
     def try_hit_enemy(self):
-        new_enemies = []
+        world = self.world
+
+        for i in self.bullets.indices(PLAYER):
+            bullet_x, bullet_y = self.bullets.cell(i)
 
-        for enemy in self.enemies:
-            if not enemy.alive:
+            enemy = world.find(bullet_x, bullet_y, ENTITY_ENEMY)
+            if enemy is None:
                 continue
 
-            (enemy_cell_x, enemy_cell_y) = enemy.get_grid_pos()
-            hit = False
+            self.bullets.active[i] = False
 
-            for bullet in self.bullets:
-                if not bullet.active or bullet.is_enemy:
-                    continue
+            is_dead = damage_enemy(world, enemy)
+
+            if is_dead:
+                kind = enemy_name(world, enemy)
+                self.enemy_counter += 1
+                self.run_kills[kind] += 1
+                spawn_explosion(world, world.x[enemy], world.y[enemy])
+
+                chance = self.rng.random()
+                bonus_to_spawn = None
 
-                bullet_x = int(bullet.x)
-                bullet_y = int(bullet.y)
-
-                if bullet_x == enemy_cell_x and bullet_y == enemy_cell_y:
-                    bullet.active = False
-                    hit = True
-
-                    is_dead = enemy.take_damage()
-                    
-                    if is_dead:
-                        self.enemy_counter += 1
-                        self.explosions.append(Explosion(enemy_cell_x, enemy_cell_y))
-
-
-                        chance = random.random()
-                        bonus_to_spawn = None
-                        
-                        if enemy.type == "BASIC":
-                            if self.game_mode == "DEFAULT":
-                                if chance < 0.15:     bonus_to_spawn = "SHOVEL"  # 15%
-                                elif chance < 0.20:   bonus_to_spawn = "SHIELD"  # 5%
-                            else:
-                                if chance < 0.05:     bonus_to_spawn = "GRENADE" # 5%
-                        
-                        elif enemy.type == "FAST":
-                            if chance < 0.15:         bonus_to_spawn = "FREEZE"  # 15%
-                            elif chance < 0.20:       bonus_to_spawn = "GRENADE" # 5%
-
-                        elif enemy.type == "SNIPER":
-                            if chance < 0.10:         bonus_to_spawn = "GRENADE" # 10%
-                            elif chance < 0.15 and self.game_mode == "DEFAULT":       bonus_to_spawn = "SHOVEL"  # 5% 
-                            elif chance < 0.18:       bonus_to_spawn = "HEART"   # 3% 
-
-                        elif enemy.type == "ARMOR":
-                            if chance < 0.10:         bonus_to_spawn = "HEART"   # 10% 
-                            elif chance < 0.25:       bonus_to_spawn = "SHIELD"  # 15% 
-                            elif chance < 0.35 and self.game_mode == "DEFAULT":       bonus_to_spawn = "SHOVEL"  # 10%
-
-                        if bonus_to_spawn:
-                            self.bonuses.append(Bonus(bullet_x, bullet_y, bonus_to_spawn))
-                    break
-
-            if enemy.alive:
-                new_enemies.append(enemy)
-
-        self.enemies = new_enemies
+                if kind == "BASIC":
+                    if self.game_mode == "DEFAULT":
+                        if chance < 0.15:     bonus_to_spawn = "SHOVEL"  # 15%
+                        elif chance < 0.20:   bonus_to_spawn = "SHIELD"  # 5%
+                    else:
+                        if chance < 0.05:     bonus_to_spawn = "GRENADE" # 5%
+
+                elif kind == "FAST":
+                    if chance < 0.15:         bonus_to_spawn = "FREEZE"  # 15%
+                    elif chance < 0.20:       bonus_to_spawn = "GRENADE" # 5%
+
+                elif kind == "SNIPER":
+                    if chance < 0.10:         bonus_to_spawn = "GRENADE" # 10%
+                    elif chance < 0.15 and self.game_mode == "DEFAULT":       bonus_to_spawn = "SHOVEL"  # 5% 
+                    elif chance < 0.18:       bonus_to_spawn = "HEART"   # 3% 
+
+                elif kind == "ARMOR":
+                    if chance < 0.10:         bonus_to_spawn = "HEART"   # 10% 
+                    elif chance < 0.25:       bonus_to_spawn = "SHIELD"  # 15% 
+                    elif chance < 0.35 and self.game_mode == "DEFAULT":       bonus_to_spawn = "SHOVEL"  # 10%
+
+                if bonus_to_spawn:
+                    spawn_bonus(world, bullet_x, bullet_y, bonus_to_spawn)
+
+    def update_bonuses(self):
+        world = self.world
+        bonuses = world.indices(ENTITY_BONUS)
+        if not len(bonuses):
+            return
+
+        world.lifetime[bonuses] -= 1
+
+        # бонус підбирається і в тік, коли його час саме вийшов
+        for i in world.find_all(self.player.x, self.player.y, ENTITY_BONUS):
+            kind = bonus_name(world, i)
+            self.apply_bonus(kind, self.player)
+            self.run_bonuses[kind] += 1
+            world.lifetime[i] = 0
+
+        world.expire(bonuses)
 
     def handle_level_completion(self):
-        save_manager.add_stats(kills=self.enemy_counter)
+        self.finish_run("WIN")
 
         if self.game_mode == "ARCADE":
-            self.draw_win_message("Ви перемогли! Наступний раунд...")
-            self.start_game()
+            self.arcade_round += 1
+            self.begin_transition(
+                "ROUND_CLEAR", [("Ви перемогли! Наступний раунд...", FPS * 2)], "PLAY", self.level_pool.take
+            )
             return
 
         if self.game_mode == "DEFAULT":
@@ -464,16 +719,17 @@ class Game:
             msg_pass = f"Рівень {current_level}"
             msg_done = "КАМПАНІЮ ЗАВЕРШЕНО!"
 
-        self.draw_win_message(f"{msg_pass} ПРОЙДЕНО")
+        messages = [(f"{msg_pass} ПРОЙДЕНО", FPS * 2)]
 
         next_level = current_level + 1
         
         if current_level >= max_level:
-            self.draw_win_message(msg_done)
+            messages.append((msg_done, FPS * 2))
             next_level = 1
 
-        save_manager.update_progress(self.game_mode, self.selected_difficulty, next_level)
-        self.game_data = save_manager.load_data()
+        if not self.headless:
+            save_manager.update_progress(self.game_mode, self.selected_difficulty, next_level)
+            self.game_data = save_manager.load_data()
 
         if self.game_mode == "DEFAULT":
             self.default_level_num = next_level
@@ -483,92 +739,204 @@ class Game:
         path = f"{folder}/level_{next_level}.txt"
         
         if os.path.exists(path):
+            # файл розбирається у фоні, start_game потім бере його з кешу level_format
+            self.begin_transition("ROUND_CLEAR", messages, "PLAY", lambda: level_format.load_level(path))
+        else:
+            messages.append(("Рівень не знайдено!", FPS * 2))
+            self.begin_transition("ROUND_CLEAR", messages, "MENU")
+
+    # state - GAME_OVER або ROUND_CLEAR; then - PLAY (наступний рівень) або MENU;
+    # preload - що виконати у фоні, поки показуються повідомлення; аркада бере його результат із pending_level
+    def begin_transition(self, state, messages, then, preload=None):
+        if self.headless and not self.hold_transitions:
+            # без екрана показувати нічого, переходимо одразу
+            self.transition_then = then
+            self.transition_messages = []
+            self.finish_transition()
+            return
+
+        self.state = state
+        self.transition_messages = list(messages)
+        self.transition_text = None
+        self.transition_timer = 0
+        self.transition_then = then
+
+        if preload and not self.headless:
+            self.preload_thread = threading.Thread(target=self.preload_level, args=(preload,), daemon=True)
+            self.preload_thread.start()
+
+    def preload_level(self, preload):
+        self.pending_level = preload()
+
+    def join_preload(self):
+        if self.preload_thread is not None:
+            self.preload_thread.join()
+            self.preload_thread = None
+
+    def handle_transition_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT: self.running = False
+            if event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_ESCAPE):
+                self.transition_timer = 0
+
+    # Тік екрана переходу: наступне повідомлення черги або, коли вона скінчилась, сам перехід
+    def update_transition(self):
+        if self.transition_timer > 0:
+            self.transition_timer -= 1
+            return
+
+        if self.transition_messages:
+            self.transition_text, self.transition_timer = self.transition_messages.pop(0)
+            self.transition_drawn = False
+            return
+
+        self.finish_transition()
+
+    def finish_transition(self):
+        self.join_preload()
+
+        if self.transition_then == "PLAY":
             self.start_game()
         else:
-            self.draw_win_message("Рівень не знайдено!")
+            self.pending_level = None
             self.state = "MENU"
+
+    def draw_transition(self):
+        if self.transition_drawn or self.state not in ("GAME_OVER", "ROUND_CLEAR"):
+            return
+        self.transition_drawn = True
+
+        if self.state == "GAME_OVER":
+            self.draw_game_over()
+        else:
+            self.draw_win_message(self.transition_text)
   
     def apply_bonus(self, bonus_type, player):
+        world = self.world
+
         if bonus_type == "GRENADE":
-            for enemy in self.enemies:
-                enemy.alive = False 
-                self.explosions.append(Explosion(enemy.x, enemy.y))
-            self.enemy_counter += len(self.enemies)
-            self.enemies = []
+            enemies = world.indices(ENTITY_ENEMY)
+            for i in enemies.tolist():
+                world.alive[i] = False
+                self.run_kills[enemy_name(world, i)] += 1
+                spawn_explosion(world, world.x[i], world.y[i])
+            self.enemy_counter += len(enemies)
 
         elif bonus_type == "SHIELD":
             player.invincible += FPS*10
         elif bonus_type == "HEART":
             player.hp +=1
         elif bonus_type == "FREEZE":
-            for enemy in self.enemies:
-                enemy.move_timer += FPS*2
-                enemy.shoot_timer += FPS*2
+            enemies = world.indices(ENTITY_ENEMY)
+            world.move_timer[enemies] += FPS*2
+            world.shoot_timer[enemies] += FPS*2
         elif bonus_type == "SHOVEL":
             self.shovel_timer = FPS * 10  # 10 секунд
-            self.set_base_protection(2)   # 2 = СТАЛЬ
+            self.set_base_protection(TILE_STEEL)
 
     # Методи малювання
+    # Малюється лише те, що потрапляє в камеру; усі прямокутники - в координатах екрана
     def draw_play(self, flip=True):
+        profiler = self.profiler
+        camera = self.camera
+
+        # камера зрушила - змінився весь кадр
+        if camera.follow(self.player.x, self.player.y, self.level.cols, self.level.rows):
+            self.full_redraw = True
+        ox, oy = camera.offset
+        visible = camera.visible
+
         self.screen.fill(BG_COLOR)
 
-        self.level.draw(self.screen)
-        self.player.draw(self.screen)
+        changed = self.level.draw(self.screen, camera)
+        if profiler:
+            profiler.lap("level")
 
+        self.player.draw(self.screen, ox, oy)
 
-        if self.game_mode == "DEFAULT" and self.base:
-             self.base.draw(self.screen)
+        # invincible-коло виходить за клітинку на 2 пікселі
+        rects = [self.player.rect.move(-ox, -oy).inflate(6, 6)]
+
+        if self.game_mode == "DEFAULT" and self.base and visible(self.base.x, self.base.y):
+             self.base.draw(self.screen, ox, oy)
+             rects.append(self.base.rect.move(-ox, -oy))
     
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+        rects.extend(draw_enemies(self.world, self.screen, camera))
 
-        for bullet in self.bullets:
-            bullet.draw(self.screen)
+        self.bullets.draw(self.screen, camera)
+        rects.extend(self.bullets.rects(camera))
 
-        for explosion in self.explosions:
-            explosion.draw(self.screen)
-        
-        for bonus in self.bonuses:
-            bonus.draw(self.screen)
+        rects.extend(draw_explosions(self.world, self.screen, camera))
+        rects.extend(draw_bonuses(self.world, self.screen, camera))
 
         # трава поверх усього
-        self.level.draw_grass(self.screen)
+        self.level.draw_grass(self.screen, camera)
+        if profiler:
+            profiler.lap("entities")
 
         # HUD
         self.draw_hud()
 
-        # flash damage
+        # flash damage: червоний кадр і наступний за ним оновлюємо повністю
+        flash = self.damage_flash_timer > 0
+        if flash or self.flash_shown:
+            self.full_redraw = True
+        self.flash_shown = flash
         self.draw_damage_flash()
+        if profiler:
+            profiler.lap("hud")
 
-        pygame.display.flip()
+        if not flip:
+            return
 
-        if flip:
+        if not self.dirty_rects or self.full_redraw:
             pygame.display.flip()
+            self.full_redraw = False
+        else:
+            # попередні позиції теж оновлюємо, щоб стерти старі спрайти
+            pygame.display.update(self.prev_rects + rects + changed + self.hud_changed)
+
+        self.prev_rects = rects
+        self.hud_changed = []
+
+        if profiler:
+            profiler.lap("flip")
+
+    # Малює рядок HUD; текст рендериться заново лише коли він змінився
+    def draw_hud_line(self, text, pos, color=HUD_TEXT_COLOR, font=None):
+        font = font or self.font
+        key = (text, color)
+        cached = self.hud_lines.get(pos)
+
+        if cached is None or cached[0] != key:
+            surf = font.render(text, True, color)
+            self.hud_lines[pos] = (key, surf)
+            self.hud_changed.append(pygame.Rect(VIEW_COLS * TILE, pos[1], HUD_WIDTH, font.get_linesize()))
+        else:
+            surf = cached[1]
+
+        self.screen.blit(surf, pos)
 
     def draw_hud(self):
-        hud_x = COLS * TILE
+        hud_x = VIEW_COLS * TILE
         pygame.draw.rect(self.screen, HUD_BG_COLOR, (hud_x, 0, HUD_WIDTH, HEIGHT))
         self.enemies_left = self.MAX_ENEMIES_PER_LEVEL - self.enemy_counter
 
-        score_surf = self.font.render(f"Рахунок: {self.enemy_counter}", True, HUD_TEXT_COLOR)
-        self.screen.blit(score_surf, (hud_x + 20, 20))
+        shown = set()
 
-        on_map_surf = self.font.render(f"Ворогів на мапі: {len(self.enemies)}", True, HUD_TEXT_COLOR)
-        self.screen.blit(on_map_surf, (hud_x + 20, 60))
+        def line(text, pos, color=HUD_TEXT_COLOR, font=None):
+            self.draw_hud_line(text, pos, color, font)
+            shown.add(pos)
 
-        if self.enemies_left < 4:
-            left_surf = self.font.render(f"Залишилось ворогів: {self.enemies_left}", True, HUD_TEXT_COLOR)
-            self.screen.blit(left_surf, (hud_x + 20, 180))
-
-        xy_text = f"XY: {int(self.player.x)}, {int(self.player.y)}"
-        xy_surf = self.font.render(xy_text, True, (200, 200, 200)) 
-        self.screen.blit(xy_surf, (hud_x + 20, 220))
+        line(f"Рахунок: {self.enemy_counter}", (hud_x + 20, 20))
+        line(f"Ворогів на мапі: {self.world.count_of(ENTITY_ENEMY)}", (hud_x + 20, 60))
 
-        hp_surf = self.font.render(f"Життів: {self.player.lives}", True, HUD_TEXT_COLOR)
-        self.screen.blit(hp_surf, (hud_x + 20, 100))
+        if self.enemies_left < 4:
+            line(f"Залишилось ворогів: {self.enemies_left}", (hud_x + 20, 180))
 
-        hp_val_surf = self.font.render(f"HP: {self.player.hp}", True, HUD_TEXT_COLOR)
-        self.screen.blit(hp_val_surf, (hud_x + 20, 140))
+        line(f"XY: {int(self.player.x)}, {int(self.player.y)}", (hud_x + 20, 220), (200, 200, 200))
+        line(f"Життів: {self.player.lives}", (hud_x + 20, 100))
+        line(f"HP: {self.player.hp}", (hud_x + 20, 140))
 
         if self.game_mode == "DEFAULT":
             lvl_text = f"Рівень класики: {self.default_level_num}"
@@ -580,8 +948,21 @@ class Game:
             lvl_text = "ARCADE"
             color = (0, 255, 255)
 
-        lvl_surf = self.font.render(lvl_text, True, color)
-        self.screen.blit(lvl_surf, (hud_x + 10, HEIGHT - 40))
+        line(lvl_text, (hud_x + 10, HEIGHT - 40), color)
+
+        # Оверлей профайлера: p50 / p95 / p99 кожної фази в мс
+        if self.profiler and self.profiler.stats:
+            y = 260
+            line("фаза         p50   p95   p99", (hud_x + 10, y), (150, 150, 150), self.stats_font)
+            for phase, (p50, p95, p99) in self.profiler.stats.items():
+                y += 18
+                line(f"{phase:<11}{p50:6.2f}{p95:6.2f}{p99:6.2f}", (hud_x + 10, y), (150, 255, 150), self.stats_font)
+
+        # рядки, що зникли з HUD, теж треба стерти з екрана
+        for pos in list(self.hud_lines):
+            if pos not in shown:
+                del self.hud_lines[pos]
+                self.hud_changed.append(pygame.Rect(hud_x, pos[1], HUD_WIDTH, self.font.get_linesize()))
 
     def draw_pause(self):
         overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -606,8 +987,18 @@ class Game:
             flash.fill((255, 0, 0, 90))
             self.screen.blit(flash, (0, 0))
 
+    def game_over(self):
+        if self.state == "GAME_OVER":
+            return
+
+        if self.base and not self.base.alive:
+            self.finish_run("LOSS", "BASE")
+        else:
+            self.finish_run("LOSS", "LIVES")
+
+        self.begin_transition("GAME_OVER", [(None, FPS * 3)], "MENU")
+
     def draw_game_over(self):
-        save_manager.add_stats(kills=self.enemy_counter, deaths=1)
         self.screen.fill((0, 0, 0))
         
         reason = None
@@ -625,11 +1016,12 @@ class Game:
         self.screen.blit(r_surf, (WIDTH // 2 - r_surf.get_width()//2, HEIGHT // 2 + 10))
 
         pygame.display.flip()
-        pygame.time.wait(3000)
-
-        self.state = "MENU"
+        self.full_redraw = True
     
     def draw_win_message(self, text):
+        if self.headless:
+            return
+
         s = pygame.Surface((WIDTH, HEIGHT))
         s.set_alpha(200)
         s.fill((0, 0, 0))
@@ -641,5 +1033,4 @@ class Game:
         self.screen.blit(win_surf, text_rect)
         
         pygame.display.flip()
-        
-        pygame.time.wait(2000)
+        self.full_redraw = True
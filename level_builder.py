@@ -1,204 +1,513 @@
 # level_builder.py
+import sys
+import time
 import pygame
 import random
+import numpy as np
+from collections import deque
 
 import os
 
-from settings import TILE, COLS, ROWS, GRASS, STEEL, BRICK, WATER, EMPTY
+from settings import TILE, COLS, ROWS, BG_COLOR
+from tiles import (
+    TILE_EMPTY, TILE_BRICK, TILE_STEEL, TILE_WATER, TILE_GRASS, CHAR_TO_TILE, TILE_TO_CHAR,
+    WALKABLE, STOPS_BULLET, DESTRUCTIBLE, WALKABLE_MASK, STOPS_BULLET_MASK, DESTRUCTIBLE_MASK,
+)
+import level_format
 import assets
 
 # 1- цегла, 2-сталь, 3-вода, 4-трава
 # # - цегла, @ - сталь, ~ - вода, % - трава, . - нічого
 
+# Умови валідної мапи: з кожного спавну ворога досяжно щонайменше MIN_AREA клітинок
+# і хоча б одна з них не вище рядка MIN_EXIT_Y
+MIN_AREA = 45
+MIN_EXIT_Y = 4
+
+# Яку картинку з assets малювати для клітинки в шарі рельєфу
+TERRAIN_IMAGES = {
+    TILE_BRICK: "brick",
+    TILE_STEEL: "steel",
+    TILE_WATER: "water",
+}
+
+
+# Старий доступ level.grid[y][x] із символами ("#", "@", ...) поверх компактної сітки
+class GridRow:
+    def __init__(self, level, y):
+        self.level = level
+        self.y = y
+
+    def __len__(self):
+        return self.level.cols
+
+    def __getitem__(self, x):
+        return TILE_TO_CHAR[self.level.tiles[self.y * self.level.cols + x]]
+
+    # приймає і символ, і код клітинки
+    def __setitem__(self, x, tile):
+        self.level.set_tile(x, self.y, CHAR_TO_TILE.get(tile, tile))
+
+
+class GridView:
+    def __init__(self, level):
+        self.level = level
+
+    def __len__(self):
+        return self.level.rows
+
+    def __getitem__(self, y):
+        return GridRow(self.level, y)
+
+
 class Level:
-    def __init__(self):
+    def __init__(self, rng=None, cols=COLS, rows=ROWS):
+        # генератор випадкових чисел гри (спільний, щоб рівні відтворювались за seed)
+        self.rng = rng or random.Random()
+
+        # Рельєф і трава заздалегідь намальовані у власні поверхні розміром з камеру;
+        # після змін перемальовуються лише видимі клітинки з dirty_tiles
+        self.terrain_layer = None
+        self.grass_layer = None
+        self.layer_view = None
+        self.dirty_tiles = set()
+        self.redraw_all = True
+
+        # Номер версії сітки: зростає при кожній зміні клітинок (для кешів на кшталт FlowField)
+        self.version = 0
+
+        self.dirty_rows = set()
+        self.dirty_cols = set()
+
+        self.resize(cols, rows)
+
+        # Скільки спроб і часу коштує генерація валідних мап
+        self.generator_stats = {"levels": 0, "tries": 0, "last_tries": 0, "max_tries": 0, "seconds": 0.0}
+
+        self.create_border()
+        self.generate_valid_level()
+
+    @property
+    def grid(self):
+        return GridView(self)
+
+    # Нова сітка cols x rows; вміст клітинок після цього порожній
+    def resize(self, cols, rows):
+        self.cols = cols
+        self.rows = rows
+
         self.enemy_spawn_points = [
             (2, 1),
-            (COLS // 2, 1),
-            (COLS - 3, 1),
+            (cols // 2, 1),
+            (cols - 3, 1),
         ]
 
-        self.grid = [[0 for _ in range(COLS)] for _ in range(ROWS)]
-        self.create_border()
-        self.generate_valid_level() 
+        # Сітка - bytearray кодів клітинок рядок за рядком (індекс y * cols + x);
+        # tile_array - NumPy-вид на ту саму пам'ять для операцій над усією мапою
+        self.tiles = bytearray(cols * rows)
+        self.tile_array = np.frombuffer(self.tiles, dtype=np.uint8).reshape(rows, cols)
+        self.tile_flat = self.tile_array.reshape(-1)
+
+        # Лінія вогню: номер відрізка рядка і стовпця між стінами, що зупиняють кулі, для кожної клітинки.
+        # Дві клітинки бачать одна одну, якщо в них однаковий відрізок; після змін перераховуються
+        # лише зачеплені рядки і стовпці - при першому запиті
+        self.row_segments = [-1] * (cols * rows)
+        self.col_segments = [-1] * (cols * rows)
+        self.dirty_tiles.clear()
+        self.invalidate_sight()
+        self.redraw_all = True
+        self.version += 1
+
+    # Копіює готову сітку у рівень; інший розмір - спершу resize
+    def load_tiles(self, tiles, cols=None, rows=None):
+        cols = cols or self.cols
+        rows = rows or self.rows
+        if (cols, rows) != (self.cols, self.rows):
+            self.resize(cols, rows)
+
+        self.tiles[:] = tiles
+        self.redraw_all = True
+        self.version += 1
+        self.invalidate_sight()
+
+    def get_tile(self, x, y):
+        return self.tiles[y * self.cols + x]
+
+    def set_tile(self, x, y, tile):
+        self.tiles[y * self.cols + x] = tile
+        self.dirty_tiles.add(y * self.cols + x)
+        self.version += 1
+        self.dirty_rows.add(y)
+        self.dirty_cols.add(x)
 
     def create_border(self):
-        for x in range(COLS):
-            self.grid[0][x] = STEEL
-            self.grid[ROWS - 1][x] = STEEL
-        for y in range(ROWS):
-            self.grid[y][0] = STEEL
-            self.grid[y][COLS - 1] = STEEL
+        self.tile_array[0, :] = TILE_STEEL
+        self.tile_array[self.rows - 1, :] = TILE_STEEL
+        self.tile_array[:, 0] = TILE_STEEL
+        self.tile_array[:, self.cols - 1] = TILE_STEEL
 
     def reset_grid(self):
-        self.grid = [[EMPTY for x in range(COLS)] for y in range(ROWS)]
+        self.tile_flat[:] = TILE_EMPTY
         self.create_border()
+        self.redraw_all = True
+        self.version += 1
+        self.invalidate_sight()
 
     def generate_random_level(self):
-        for y in range(2, ROWS - 2, 2):
-            for x in range(2, COLS // 2, 2):
+        tiles = self.tiles
+        cols = self.cols
+
+        for y in range(2, self.rows - 2, 2):
+            for x in range(2, cols // 2, 2):
+
+                r = self.rng.random()
 
-                r = random.random()
-                
                 if r < 0.15:
-                    self.grid[y][x] = WATER
+                    tiles[y * cols + x] = TILE_WATER
 
                 elif r < 0.25:
-                    self.grid[y][x] = STEEL
-                    if x + 1 < COLS - 1:
-                        self.grid[y][x + 1] = STEEL
+                    tiles[y * cols + x] = TILE_STEEL
+                    if x + 1 < cols - 1:
+                        tiles[y * cols + x + 1] = TILE_STEEL
 
                 elif r < 0.50:
-                    height = random.randint(2, 5)
-                    self.add_vertical_line(x, y, height, BRICK)
+                    height = self.rng.randint(2, 5)
+                    self.add_vertical_line(x, y, height, TILE_BRICK)
 
                 elif r < 0.75:
-                    width = random.randint(2, 5)
-                    self.add_horizontal_line(x, y, width, BRICK)
+                    width = self.rng.randint(2, 5)
+                    self.add_horizontal_line(x, y, width, TILE_BRICK)
 
                 else:
-                    self.grid[y][x] = GRASS
-                    if x + 1 < COLS - 1 and random.random() < 0.5:
-                        self.grid[y][x + 1] = GRASS
+                    tiles[y * cols + x] = TILE_GRASS
+                    if x + 1 < cols - 1 and self.rng.random() < 0.5:
+                        tiles[y * cols + x + 1] = TILE_GRASS
 
-        for y in range(ROWS):
-            for x in range(COLS // 2):
-                self.grid[y][COLS - 1 - x] = self.grid[y][x]
+        # дзеркалимо ліву половину на праву
+        half = cols // 2
+        self.tile_array[:, cols - half:] = self.tile_array[:, half - 1::-1]
 
         for spawn_x, spawn_y in self.enemy_spawn_points:
-            if 0 <= spawn_x < COLS and 0 <= spawn_y < ROWS:
-                self.grid[spawn_y][spawn_x] = EMPTY
+            if 0 <= spawn_x < cols and 0 <= spawn_y < self.rows:
+                tiles[spawn_y * cols + spawn_x] = TILE_EMPTY
 
     def add_vertical_line(self, x, y, length, type_id):
         for i in range(length):
-            if y + i < ROWS - 1:
-                self.grid[y + i][x] = type_id
+            if y + i < self.rows - 1:
+                self.tiles[(y + i) * self.cols + x] = type_id
 
     def add_horizontal_line(self, x, y, length, type_id):
         for i in range(length):
-            if x + i < COLS - 1:
-                self.grid[y][x + i] = type_id
+            if x + i < self.cols - 1:
+                self.tiles[y * self.cols + x + i] = type_id
 
     def tile_is_walkable(self, x, y):
-        return self.grid[y][x] in (EMPTY, GRASS)
+        return bool(WALKABLE[self.tiles[y * self.cols + x]])
 
     def bfs(self, spawn_x, spawn_y):
         if not self.tile_is_walkable(spawn_x, spawn_y):
             return set()
 
+        cols, rows = self.cols, self.rows
         visited_tiles = set([(spawn_x, spawn_y)])
-        queue = [(spawn_x, spawn_y)]
+        queue = deque([(spawn_x, spawn_y)])
 
-        while len(queue) != 0:
-            (x, y) = queue.pop(0)
+        while queue:
+            (x, y) = queue.popleft()
             for (dx, dy) in ((1, 0), (-1, 0), (0, 1), (0, -1)):
                 (new_x, new_y) = (x + dx, y + dy)
-                if 0 <= new_x < COLS and 0 <= new_y < ROWS:
+                if 0 <= new_x < cols and 0 <= new_y < rows:
                     if (new_x, new_y) not in visited_tiles and self.tile_is_walkable(new_x, new_y):
                         visited_tiles.add((new_x, new_y))
                         queue.append((new_x, new_y))
 
         return visited_tiles
 
-    def is_level_valid(self):
-        MIN_AREA = 45 
-        MIN_EXIT_Y = 4
-
-        for spawn_x, spawn_y in self.enemy_spawn_points:
-            reachable_tiles = self.bfs(spawn_x, spawn_y)
+    # Один прохід заливки на всі точки: кожна зв'язна область рахується лише раз.
+    # Повертає для кожної точки (розмір області, найнижчий рядок) або None, якщо точка в стіні
+    def flood_regions(self, points):
+        tiles = self.tiles
+        cols = self.cols
+        size = cols * self.rows
+        labels = [0] * size
+        regions = []
+        result = []
+
+        for (x, y) in points:
+            start = y * cols + x
+
+            if not WALKABLE[tiles[start]]:
+                result.append(None)
+                continue
+
+            if labels[start]:
+                result.append(regions[labels[start] - 1])
+                continue
+
+            label = len(regions) + 1
+            labels[start] = label
+            queue = deque([start])
+            count = 0
+            max_y = 0
+
+            while queue:
+                i = queue.popleft()
+                count += 1
+                row, col = divmod(i, cols)
+                if row > max_y:
+                    max_y = row
+
+                for j in (
+                    i - 1 if col > 0 else -1,
+                    i + 1 if col < cols - 1 else -1,
+                    i - cols,
+                    i + cols if i + cols < size else -1,
+                ):
+                    if j >= 0 and not labels[j] and WALKABLE[tiles[j]]:
+                        labels[j] = label
+                        queue.append(j)
+
+            regions.append((count, max_y))
+            result.append(regions[-1])
+
+        return result
 
-            if len(reachable_tiles) < MIN_AREA:
+    def is_level_valid(self):
+        for region in self.flood_regions(self.enemy_spawn_points):
+            if region is None:
                 return False
 
-            if not any(y >= MIN_EXIT_Y for (x, y) in reachable_tiles):
+            count, max_y = region
+            if count < MIN_AREA or max_y < MIN_EXIT_Y:
                 return False
 
         return True
 
     def generate_valid_level(self, tries=999):
+        start = time.perf_counter()
+
+        # рахуються лише спроби до прийнятої мапи включно
+        used = tries
         for _try_ in range(tries):
             self.reset_grid()
             self.generate_random_level()
             if self.is_level_valid():
-                return
+                used = _try_ + 1
+                break
+
+        stats = self.generator_stats
+        stats["levels"] += 1
+        stats["tries"] += used
+        stats["last_tries"] = used
+        stats["max_tries"] = max(stats["max_tries"], used)
+        stats["seconds"] += time.perf_counter() - start
+
+    def get_generator_stats(self):
+        stats = dict(self.generator_stats)
+        levels = max(stats["levels"], 1)
+        stats["tries_per_level"] = stats["tries"] / levels
+        stats["ms_per_level"] = stats["seconds"] * 1000 / levels
+        return stats
+
+    def invalidate_sight(self):
+        self.dirty_rows.update(range(self.rows))
+        self.dirty_cols.update(range(self.cols))
+
+    def update_sight(self):
+        tiles = self.tiles
+        cols = self.cols
+
+        for y in self.dirty_rows:
+            segment = 0
+            for i in range(y * cols, (y + 1) * cols):
+                if STOPS_BULLET[tiles[i]]:
+                    segment += 1
+                    self.row_segments[i] = -1
+                else:
+                    self.row_segments[i] = segment
+
+        for x in self.dirty_cols:
+            segment = 0
+            for i in range(x, cols * self.rows, cols):
+                if STOPS_BULLET[tiles[i]]:
+                    segment += 1
+                    self.col_segments[i] = -1
+                else:
+                    self.col_segments[i] = segment
+
+        self.dirty_rows.clear()
+        self.dirty_cols.clear()
+
+    # Чи долетить куля з (x1, y1) у (x2, y2): одна лінія і жодної стіни між ними
+    def clear_shot(self, x1, y1, x2, y2):
+        if self.dirty_rows or self.dirty_cols:
+            self.update_sight()
+
+        if y1 == y2:
+            segments = self.row_segments
+        elif x1 == x2:
+            segments = self.col_segments
+        else:
+            return False
+
+        segment = segments[y1 * self.cols + x1]
+        return segment >= 0 and segment == segments[y2 * self.cols + x2]
 
     def can_move(self, new_x, new_y):
-        if new_x < 0 or new_x >= COLS or new_y < 0 or new_y >= ROWS:
+        if new_x < 0 or new_x >= self.cols or new_y < 0 or new_y >= self.rows:
             return False
-        tile = self.grid[new_y][new_x]
-        return tile in (EMPTY, GRASS)
+        return bool(WALKABLE[self.tiles[new_y * self.cols + new_x]])
+
+    # Векторний can_move: масиви x, y -> маска клітинок, куди можна ступити
+    def can_move_cells(self, xs, ys):
+        inside = (xs >= 0) & (xs < self.cols) & (ys >= 0) & (ys < self.rows)
+        result = np.zeros(len(xs), dtype=bool)
+        result[inside] = WALKABLE_MASK[self.tile_flat[ys[inside] * self.cols + xs[inside]]]
+        return result
 
     def hit_cell(self, x, y):
-        if 0 <= x < COLS and 0 <= y < ROWS:
-            tile = self.grid[y][x]
-            if tile == BRICK:
-                self.grid[y][x] = EMPTY
-                return True
-            elif tile == STEEL:
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            tile = self.tiles[y * self.cols + x]
+            if DESTRUCTIBLE[tile]:
+                self.set_tile(x, y, TILE_EMPTY)
                 return True
+            return bool(STOPS_BULLET[tile])
         return False
 
+    # Векторне влучання куль: cells - номери клітинок (y * cols + x) у порядку куль.
+    # Повертає маску куль, що зупинились. Цеглу руйнує лише перша куля в клітинці
+    def hit_cells(self, cells):
+        tiles = self.tile_flat[cells]
+        stopped = STOPS_BULLET_MASK[tiles]
+        destructible = DESTRUCTIBLE_MASK[tiles]
+
+        if destructible.any():
+            hit = np.flatnonzero(destructible)
+            broken, first = np.unique(cells[hit], return_index=True)
+
+            stopped[hit] = False
+            stopped[hit[first]] = True
+            self.tile_flat[broken] = TILE_EMPTY
+            broken = broken.tolist()
+            self.dirty_tiles.update(broken)
+            self.version += 1
+            cols = self.cols
+            for i in broken:
+                y, x = divmod(i, cols)
+                self.dirty_rows.add(y)
+                self.dirty_cols.add(x)
+
+        return stopped
+
+    # Рівень з файлу: розібраний і скомпільований level_format, тут лише копія буфера
     def load_from_file(self, filename):
-        self.reset_grid()
-        enemies = []
-
-        with open(filename, 'r') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
-
-        enemy_char_map = {
-            'b': 'BASIC',
-            'f': 'FAST',
-            'a': 'ARMOR',
-            's': 'SNIPER'
-        }
-
-        map_row = 0
-        for line in lines:
-
-            if line.startswith("ENEMIES:"):
-                code_string = line.split(":")[1].strip()
-                for char in code_string:
-                    if char in enemy_char_map:
-                        enemies.append(enemy_char_map[char])
-                continue 
-
-            if map_row < ROWS:
-                for x in range(min(COLS, len(line))):
-                    char = line[x]
-                    if char == BRICK: self.grid[map_row][x] = BRICK
-                    elif char == STEEL: self.grid[map_row][x] = STEEL
-                    elif char == WATER: self.grid[map_row][x] = WATER
-                    elif char == GRASS: self.grid[map_row][x] = GRASS
-                    else: self.grid[map_row][x] = EMPTY
-                
-                map_row += 1
+        tiles, cols, rows, enemies = level_format.load_level(filename)
+        self.load_tiles(tiles, cols, rows)
 
         for spawn_x, spawn_y in self.enemy_spawn_points:
-             self.grid[spawn_y][spawn_x] = EMPTY
-             
+             self.tiles[spawn_y * self.cols + spawn_x] = TILE_EMPTY
+
         if not enemies:
-            enemies = ["BASIC"] * 20 
-
-        return enemies
-
-    def draw(self, screen):
-        for row in range(ROWS):
-            for col in range(COLS):
-                tile = self.grid[row][col]
-                px = col * TILE
-                py = row * TILE
-
-                if tile == BRICK:
-                    screen.blit(assets.brick, (px, py))
-                elif tile == STEEL:
-                    screen.blit(assets.steel, (px, py))
-                elif tile == WATER:
-                    screen.blit(assets.water, (px, py))
-
-    def draw_grass(self, screen):
-        for row in range(ROWS):
-            for col in range(COLS):
-                if self.grid[row][col] == GRASS:
-                    px = col * TILE
-                    py = row * TILE
-                    screen.blit(assets.grass, (px, py))
+            enemies = ["BASIC"] * 20
+
+        return list(enemies)
+
+    # Клітинка (x, y) мапи в шарах; поза мапою - порожньо
+    def render_cell(self, x, y):
+        view_x, view_y, _, _ = self.layer_view
+        rect = pygame.Rect((x - view_x) * TILE, (y - view_y) * TILE, TILE, TILE)
+        tile = self.tiles[y * self.cols + x] if 0 <= x < self.cols and 0 <= y < self.rows else TILE_EMPTY
+
+        self.terrain_layer.fill(BG_COLOR, rect)
+        name = TERRAIN_IMAGES.get(tile)
+        if name:
+            self.terrain_layer.blit(getattr(assets, name), rect)
+
+        self.grass_layer.fill((0, 0, 0, 0), rect)
+        if tile == TILE_GRASS:
+            self.grass_layer.blit(assets.grass, rect)
+
+        return rect
+
+    def render_area(self, x, y, cols, rows):
+        for cell_y in range(y, y + rows):
+            for cell_x in range(x, x + cols):
+                self.render_cell(cell_x, cell_y)
+
+    # Шари покривають лише видиму частину мапи (камера або вся мапа, якщо камери немає).
+    # Повертає прямокутники на екрані, що перемальовані з минулого разу
+    def update_layers(self, camera=None):
+        if camera:
+            view = (camera.x, camera.y, camera.cols, camera.rows)
+        else:
+            view = (0, 0, self.cols, self.rows)
+        x, y, cols, rows = view
+
+        if self.terrain_layer is None or self.layer_view[2:] != view[2:]:
+            size = (cols * TILE, rows * TILE)
+            self.terrain_layer = pygame.Surface(size)
+            self.grass_layer = pygame.Surface(size, pygame.SRCALPHA)
+            self.redraw_all = True
+
+        old_view = self.layer_view
+        self.layer_view = view
+
+        if not self.redraw_all and old_view != view:
+            # камера зрушила: зсуваємо готові шари і домальовуємо лише відкриті смуги
+            dx = x - old_view[0]
+            dy = y - old_view[1]
+            if abs(dx) >= cols or abs(dy) >= rows:
+                self.redraw_all = True
+            else:
+                self.terrain_layer.scroll(-dx * TILE, -dy * TILE)
+                self.grass_layer.scroll(-dx * TILE, -dy * TILE)
+                if dx > 0:
+                    self.render_area(x + cols - dx, y, dx, rows)
+                elif dx < 0:
+                    self.render_area(x, y, -dx, rows)
+                if dy > 0:
+                    self.render_area(x, y + rows - dy, cols, dy)
+                elif dy < 0:
+                    self.render_area(x, y, cols, -dy)
+
+        if self.redraw_all:
+            self.redraw_all = False
+            self.dirty_tiles.clear()
+            self.render_area(x, y, cols, rows)
+            return [self.terrain_layer.get_rect()]
+
+        changed = []
+        if self.dirty_tiles:
+            # невидимі клітинки домалюються, коли потраплять у кадр
+            for index in self.dirty_tiles:
+                cell_y, cell_x = divmod(index, self.cols)
+                if x <= cell_x < x + cols and y <= cell_y < y + rows:
+                    changed.append(self.render_cell(cell_x, cell_y))
+            self.dirty_tiles.clear()
+
+        if old_view != view:
+            return [self.terrain_layer.get_rect()]
+        return changed
+
+    def draw(self, screen, camera=None):
+        changed = self.update_layers(camera)
+        screen.blit(self.terrain_layer, (0, 0))
+        return changed
+
+    def draw_grass(self, screen, camera=None):
+        self.update_layers(camera)
+        screen.blit(self.grass_layer, (0, 0))
+
+
+if __name__ == "__main__":
+    # python level_builder.py [кількість мап]
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    level = Level(random.Random(0))
+
+    for _ in range(count - 1):
+        level.generate_valid_level()
+
+    stats = level.get_generator_stats()
+    print(f"Мап: {stats['levels']}, спроб на мапу: {stats['tries_per_level']:.2f} "
+          f"(макс. {stats['max_tries']}), {stats['ms_per_level']:.3f} мс на мапу")
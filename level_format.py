@@ -0,0 +1,179 @@
+import os
+import sys
+import struct
+from collections import OrderedDict
+
+from settings import COLS, ROWS
+from tiles import TILE_EMPTY, TILE_STEEL, CHAR_TO_TILE, ENEMY_CHARS
+
+# Скомпільований рівень: заголовок, сітка кодів клітинок (cols * rows байт, рядок за рядком)
+# і черга ворогів - по одному символу з ENEMY_CHARS на танк.
+# У заголовку також час зміни і розмір текстового джерела, щоб знати, коли перекомпілювати
+MAGIC = b"BCLV"
+VERSION = 2
+HEADER = struct.Struct("<4sHHHHqq")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPILED_DIR = os.path.join(BASE_DIR, ".cache", "levels")
+
+ENEMY_TO_CHAR = {name: char for char, name in ENEMY_CHARS.items()}
+
+# Розібрані рівні: (шлях, mtime_ns) -> (tiles, cols, rows, enemies)
+CACHE_SIZE = 32
+cache = OrderedDict()
+
+
+# Розбір текстового файлу. Повертає (tiles, cols, rows, enemies, unknown), де unknown -
+# список (рядок, колонка, символ) для символів, яких немає в легенді.
+# Розмір мапи - за кількістю рядків і найдовшим рядком, але не менший за COLS x ROWS
+def parse_level_text(text):
+    lines = [
+        (line_num, raw) for line_num, raw in enumerate(text.splitlines(), 1)
+        if raw.strip()
+    ]
+    map_lines = [raw.strip() for _, raw in lines if not raw.strip().startswith("ENEMIES:")]
+    cols = max([COLS] + [len(line) for line in map_lines])
+    rows = max(ROWS, len(map_lines))
+
+    tiles = bytearray([TILE_EMPTY]) * (cols * rows)
+    for x in range(cols):
+        tiles[x] = TILE_STEEL
+        tiles[(rows - 1) * cols + x] = TILE_STEEL
+    for y in range(rows):
+        tiles[y * cols] = TILE_STEEL
+        tiles[y * cols + cols - 1] = TILE_STEEL
+
+    enemies = []
+    unknown = []
+
+    map_row = 0
+    for line_num, raw in lines:
+        line = raw.strip()
+
+        if line.startswith("ENEMIES:"):
+            offset = raw.index(":") + 1
+            for col, char in enumerate(raw[offset:], offset + 1):
+                if char in ENEMY_CHARS:
+                    enemies.append(ENEMY_CHARS[char])
+                elif not char.isspace():
+                    unknown.append((line_num, col, char))
+            continue
+
+        col_offset = len(raw) - len(raw.lstrip())
+        for x in range(len(line)):
+            tile = CHAR_TO_TILE.get(line[x])
+            if tile is None:
+                unknown.append((line_num, col_offset + x + 1, line[x]))
+                tile = TILE_EMPTY
+            tiles[map_row * cols + x] = tile
+
+        map_row += 1
+
+    return bytes(tiles), cols, rows, enemies, unknown
+
+
+def compiled_path(path):
+    name = os.path.relpath(os.path.abspath(path), BASE_DIR)
+    name = name.replace(os.sep, "_").replace("..", "_")
+    return os.path.join(COMPILED_DIR, os.path.splitext(name)[0] + ".lvl")
+
+
+def pack_level(tiles, cols, rows, enemies, mtime_ns, size):
+    header = HEADER.pack(MAGIC, VERSION, cols, rows, len(enemies), mtime_ns, size)
+    return header + tiles + "".join(ENEMY_TO_CHAR[name] for name in enemies).encode("ascii")
+
+
+# Повертає (tiles, cols, rows, enemies, mtime_ns, size) або None, якщо дані не схожі на рівень цієї версії
+def unpack_level(data):
+    if len(data) < HEADER.size:
+        return None
+
+    magic, version, cols, rows, enemy_count, mtime_ns, size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or not cols or not rows:
+        return None
+
+    start = HEADER.size
+    end = start + cols * rows
+    if len(data) != end + enemy_count:
+        return None
+
+    tiles = data[start:end]
+    try:
+        enemies = [ENEMY_CHARS[char] for char in data[end:].decode("ascii")]
+    except (UnicodeDecodeError, KeyError):
+        return None
+
+    return tiles, cols, rows, enemies, mtime_ns, size
+
+
+# Компілює текстовий рівень у .lvl; повертає (tiles, cols, rows, enemies, unknown)
+def compile_level(path):
+    st = os.stat(path)
+    with open(path, "r") as f:
+        tiles, cols, rows, enemies, unknown = parse_level_text(f.read())
+
+    target = compiled_path(path)
+    try:
+        os.makedirs(COMPILED_DIR, exist_ok=True)
+        tmp = target + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(pack_level(tiles, cols, rows, enemies, st.st_mtime_ns, st.st_size))
+        os.replace(tmp, target)
+    except OSError as e:
+        print(f"Не вдалося зберегти скомпільований рівень {target}: {e}")
+
+    return tiles, cols, rows, enemies, unknown
+
+
+# Рівень за шляхом до текстового файлу: спершу з кешу в пам'яті,
+# потім зі скомпільованого файлу (одне читання), інакше - компіляція
+def load_level(path):
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_mtime_ns)
+
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    level = None
+    try:
+        with open(compiled_path(path), "rb") as f:
+            level = unpack_level(f.read())
+    except OSError:
+        pass
+
+    if level is not None and level[4:] == (st.st_mtime_ns, st.st_size):
+        level = level[:4]
+    else:
+        tiles, cols, rows, enemies, unknown = compile_level(path)
+        for line_num, col, char in unknown:
+            print(f"{path}:{line_num}:{col}: невідомий символ {char!r}")
+        level = (tiles, cols, rows, enemies)
+
+    cache[key] = level
+    if len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+
+    return level
+
+
+if __name__ == "__main__":
+    # Крок збірки: python level_format.py [файли...] - компілює рівні і показує невідомі символи
+    paths = sys.argv[1:]
+    if not paths:
+        for folder in ("levels", "classic_levels"):
+            folder = os.path.join(BASE_DIR, folder)
+            if os.path.isdir(folder):
+                paths += sorted(
+                    os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".txt")
+                )
+
+    problems = 0
+    for path in paths:
+        tiles, cols, rows, enemies, unknown = compile_level(path)
+        for line_num, col, char in unknown:
+            print(f"{path}:{line_num}:{col}: невідомий символ {char!r}")
+        problems += len(unknown)
+        print(f"{path} -> {compiled_path(path)}: {cols}x{rows}, ворогів {len(enemies)}")
+
+    print(f"Рівнів: {len(paths)}, невідомих символів: {problems}")
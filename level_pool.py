@@ -0,0 +1,75 @@
+import random
+import threading
+from collections import deque
+
+from settings import LEVEL_POOL_SIZE, ARCADE_COLS, ARCADE_ROWS
+from level_builder import Level
+
+ARCADE_ENEMY_TYPES = ["BASIC", "FAST", "ARMOR", "SNIPER"]
+
+
+# Запас готових аркадних мап (сітка, її розмір і черга ворогів), які фоновий потік
+# генерує наперед. Усі мапи беруться з однієї послідовності за seed, тож
+# порожній пул (генерація на місці) дає ті самі рівні, що й повний
+class LevelPool:
+    def __init__(self, size=LEVEL_POOL_SIZE):
+        self.size = size
+        self.ready = deque()
+        self.cond = threading.Condition()
+
+        self.level = None
+        self.enemy_count = 0
+        self.misses = 0
+
+        self.running = False
+        self.thread = None
+
+    # Нова послідовність мап: викликається на старті аркадної сесії
+    def reset(self, seed, enemy_count):
+        with self.cond:
+            self.ready.clear()
+            self.level = Level(random.Random(seed), ARCADE_COLS, ARCADE_ROWS)
+            self.enemy_count = enemy_count
+            self.cond.notify_all()
+
+        if self.size > 0 and self.thread is None:
+            self.running = True
+            self.thread = threading.Thread(target=self.worker, name="level-pool", daemon=True)
+            self.thread.start()
+
+    # Наступна мапа послідовності; викликати лише під self.cond
+    def generate(self):
+        self.level.generate_valid_level()
+        enemies = [self.level.rng.choice(ARCADE_ENEMY_TYPES) for _ in range(self.enemy_count)]
+        return bytes(self.level.tiles), self.level.cols, self.level.rows, enemies
+
+    def worker(self):
+        while True:
+            with self.cond:
+                while self.running and (self.level is None or len(self.ready) >= self.size):
+                    self.cond.wait()
+
+                if not self.running:
+                    return
+
+                self.ready.append(self.generate())
+
+    def take(self):
+        with self.cond:
+            if self.ready:
+                item = self.ready.popleft()
+                self.cond.notify_all()
+                return item
+
+            # пул порожній - генеруємо на місці
+            self.misses += 1
+            return self.generate()
+
+    def close(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
@@ -1,4 +1,20 @@
+import argparse
+
 from game import Game
+from replay import InputRecorder
+from shared_state import SharedStatePublisher
 
 if __name__ == "__main__":
-    Game().run()
+    parser = argparse.ArgumentParser(description="Battle City: 1337 Edition")
+    parser.add_argument("--seed", type=int, default=None, help="фіксований seed для кожної сесії")
+    parser.add_argument("--record", metavar="DIR", default=None, help="записувати ввід сесій у папку DIR")
+    parser.add_argument("--profile", metavar="FILE", default=None,
+                        help="увімкнути профайлер кадрів і писати їх у FILE (.csv або .jsonl)")
+    parser.add_argument("--shm", metavar="NAME", default=None,
+                        help="публікувати стан гри у блок спільної пам'яті NAME (python shared_state.py NAME)")
+    args = parser.parse_args()
+
+    recorder = InputRecorder(args.record) if args.record else None
+    publisher = SharedStatePublisher(args.shm) if args.shm else None
+
+    Game(seed=args.seed, recorder=recorder, profile_log=args.profile, publisher=publisher).run()
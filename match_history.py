@@ -0,0 +1,186 @@
+import os
+import sys
+import json
+import time
+import queue
+import sqlite3
+import threading
+
+import save_manager
+
+HISTORY_FILE = "match_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    result TEXT NOT NULL,
+    cause TEXT,
+    kills INTEGER NOT NULL,
+    kills_by_type TEXT NOT NULL,
+    bonuses TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_level ON runs (mode, difficulty, level, result);
+CREATE INDEX IF NOT EXISTS runs_by_cause ON runs (cause);
+
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    games INTEGER NOT NULL,
+    kills INTEGER NOT NULL,
+    deaths INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INSERT_RUN = """
+INSERT INTO runs (started_at, mode, difficulty, level, ticks, seconds, result, cause, kills, kills_by_type, bonuses)
+VALUES (:started_at, :mode, :difficulty, :level, :ticks, :seconds, :result, :cause, :kills, :kills_by_type, :bonuses)
+"""
+
+UPDATE_TOTALS = "UPDATE totals SET games = games + ?, kills = kills + ?, deaths = deaths + ? WHERE id = 1"
+
+# Елемент черги записів: почалася нова гра (рядків забігів у ній може бути кілька)
+GAME_STARTED = "game"
+
+WIN_RATES = """
+SELECT mode, difficulty, level, COUNT(*), SUM(result = 'WIN'), AVG(seconds)
+FROM runs
+GROUP BY mode, difficulty, level
+ORDER BY mode, difficulty, level
+"""
+
+
+def connect(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# Історія забігів у SQLite: рядок на кожен рівень (перемога, поразка або вихід у меню).
+# Записи йдуть через чергу у потік match-history; загальні лічильники для меню
+# лежать в окремій таблиці totals і тримаються в пам'яті, тож старт не залежить від розміру історії.
+# Ігри в totals рахує start_game - одна на сесію з меню, а не на рядок забігу
+class MatchHistory:
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.queue = queue.Queue()
+
+        conn = connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+            self.migrate(conn)
+            games, kills, deaths = conn.execute("SELECT games, kills, deaths FROM totals WHERE id = 1").fetchone()
+        conn.close()
+
+        # ті самі ключі, що й у stats старого save_data.json
+        self.totals = {"total_games": games, "total_kills": kills, "deaths": deaths}
+
+        self.thread = threading.Thread(target=self.writer, name="match-history", daemon=True)
+        self.thread.start()
+
+    # Одноразове перенесення лічильників із save_data.json
+    def migrate(self, conn):
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+            return
+
+        stats = save_manager.load_data()["stats"]
+        conn.execute(
+            "INSERT OR REPLACE INTO totals (id, games, kills, deaths) VALUES (1, ?, ?, ?)",
+            (stats.get("total_games", 0), stats.get("total_kills", 0), stats.get("deaths", 0)),
+        )
+        conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', ?)", (str(time.time()),))
+
+    def writer(self):
+        conn = connect(self.path)
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            # усе, що встигло накопичитись, - однією транзакцією
+            items = [item]
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.put(None)
+                    break
+                items.append(item)
+
+            runs = [item for item in items if item is not GAME_STARTED]
+            games = len(items) - len(runs)
+            kills = sum(run["kills"] for run in runs)
+            deaths = sum(run["result"] == "LOSS" for run in runs)
+
+            try:
+                with conn:
+                    conn.executemany(INSERT_RUN, runs)
+                    conn.execute(UPDATE_TOTALS, (games, kills, deaths))
+            except sqlite3.Error as e:
+                print(f"Помилка запису історії: {e}")
+
+        conn.close()
+
+    def start_game(self):
+        self.totals["total_games"] += 1
+        self.queue.put(GAME_STARTED)
+
+    # kills_by_type і bonuses - словники тип -> кількість
+    def record(self, mode, difficulty, level, ticks, seconds, result, cause, kills_by_type, bonuses, started_at):
+        kills = sum(kills_by_type.values())
+
+        self.totals["total_kills"] += kills
+        if result == "LOSS":
+            self.totals["deaths"] += 1
+
+        self.queue.put({
+            "started_at": started_at,
+            "mode": mode,
+            "difficulty": difficulty,
+            "level": level,
+            "ticks": ticks,
+            "seconds": seconds,
+            "result": result,
+            "cause": cause,
+            "kills": kills,
+            "kills_by_type": json.dumps(kills_by_type, sort_keys=True),
+            "bonuses": json.dumps(bonuses, sort_keys=True),
+        })
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+# (mode, difficulty, level, забігів, перемог, середня тривалість) для кожного рівня
+def win_rates(path=HISTORY_FILE):
+    conn = connect(path)
+    try:
+        return conn.execute(WIN_RATES).fetchall()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    # python match_history.py [файл] - відсоток перемог по рівнях
+    path = sys.argv[1] if len(sys.argv) > 1 else HISTORY_FILE
+    if not os.path.exists(path):
+        print(f"Історії {path} ще немає")
+        sys.exit(1)
+
+    print(f"{'Режим':<10}{'Складність':<12}{'Рівень':>7}{'Ігор':>8}{'Перемог':>9}{'Сер. с':>9}")
+    for mode, difficulty, level, runs, wins, seconds in win_rates(path):
+        print(f"{mode:<10}{difficulty:<12}{level:>7}{runs:>8}{wins / runs:>9.0%}{seconds:>9.1f}")
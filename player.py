@@ -3,8 +3,26 @@ import pygame
 from settings import TILE, PLAYER_SPEED_TILES, ROWS
 import assets
 
+# Клавіші -> (напрямок, dx, dy)
+CONTROLS = (
+    ((pygame.K_w, pygame.K_UP),    ("UP",    0, -1)),
+    ((pygame.K_s, pygame.K_DOWN),  ("DOWN",  0,  1)),
+    ((pygame.K_a, pygame.K_LEFT),  ("LEFT", -1,  0)),
+    ((pygame.K_d, pygame.K_RIGHT), ("RIGHT", 1,  0)),
+)
+
+# Напрямок -> ім'я картинки в assets
+PLAYER_IMAGES = {
+    "UP": "player_up",
+    "DOWN": "player_down",
+    "LEFT": "player_left",
+    "RIGHT": "player_right",
+}
+
 
 class Player:
+    __slots__ = ("start_pos", "x", "y", "direction", "hp", "invincible", "lives", "size", "move_cooldown", "spawn")
+
     def __init__(self, cell_x, cell_y, lives = 3):
 
         self.start_pos = (cell_x, cell_y)
@@ -23,13 +41,6 @@ class Player:
 
         self.spawn = (2, ROWS - 3)
 
-        self.controls = {
-            (pygame.K_w, pygame.K_UP):    lambda: ("UP",    0, -1),
-            (pygame.K_s, pygame.K_DOWN):  lambda: ("DOWN",  0,  1),
-            (pygame.K_a, pygame.K_LEFT):  lambda: ("LEFT", -1,  0),
-            (pygame.K_d, pygame.K_RIGHT): lambda: ("RIGHT", 1,  0),
-        }
-
     @property
     def rect(self):
         return pygame.Rect(self.x * TILE, self.y * TILE, TILE, TILE)
@@ -59,9 +70,8 @@ class Player:
             self.move_cooldown -= 1
             return
 
-        for key_group, action in self.controls.items():
-            if any(keys[k] for k in key_group):
-                direction, dx, dy = action()
+        for (key, alt_key), (direction, dx, dy) in CONTROLS:
+            if keys[key] or keys[alt_key]:
                 self.direction = direction
 
                 new_x = self.x + dx
@@ -80,21 +90,15 @@ class Player:
         if self.invincible > 0:
             self.invincible -= 1
 
-    def draw(self, screen):
-        img_by_dir = {
-            "UP": assets.player_up,
-            "DOWN": assets.player_down,
-            "LEFT": assets.player_left,
-            "RIGHT": assets.player_right,
-        }
-        img = img_by_dir.get(self.direction)
+    def draw(self, screen, ox=0, oy=0):
+        img = getattr(assets, PLAYER_IMAGES[self.direction])
 
         if img is None:
             return
         
         if self.invincible > 0:
-            сenter = (self.x * TILE + TILE // 2, self.y * TILE + TILE // 2)
+            сenter = (self.x * TILE + TILE // 2 - ox, self.y * TILE + TILE // 2 - oy)
             radius = TILE // 2 + 2
             pygame.draw.circle(screen, (100, 100, 255), сenter, radius, width=2)
 
-        screen.blit(img, (self.x * TILE, self.y * TILE))
+        screen.blit(img, (self.x * TILE - ox, self.y * TILE - oy))
@@ -0,0 +1,84 @@
+import json
+import time
+from collections import deque
+
+# Фази кадру в порядку виконання
+PHASES = (
+    "events", "enemies", "spawning", "bullets", "hits", "player", "bonuses", "transitions",
+    "level", "entities", "hud", "flip",
+)
+
+# Скільки останніх кадрів беремо для перцентилів
+WINDOW = 300
+# Раз на скільки кадрів перераховувати перцентилі для оверлею
+REFRESH = 30
+
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+# Час кожної фази кадру: lap(phase) додає до фази час від попередньої позначки.
+# Вимкнений профайлер - це просто self.profiler = None у грі, тож зайвих викликів немає
+class FrameProfiler:
+    def __init__(self, path=None):
+        self.samples = {phase: deque(maxlen=WINDOW) for phase in PHASES + ("total",)}
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frame = 0
+        self.frame_start = self.last = time.perf_counter()
+        self.stats = {}
+
+        # Потік кадрів у файл: .jsonl - рядок JSON на кадр, інакше CSV
+        self.file = None
+        self.jsonl = False
+        if path:
+            self.jsonl = path.endswith(".jsonl")
+            self.file = open(path, "a")
+            if not self.jsonl and self.file.tell() == 0:
+                self.file.write(",".join(("frame",) + PHASES + ("total",)) + "\n")
+
+    def begin_frame(self):
+        self.frame_start = self.last = time.perf_counter()
+        for phase in self.current:
+            self.current[phase] = 0.0
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        total = self.last - self.frame_start
+        self.frame += 1
+
+        for phase, value in self.current.items():
+            self.samples[phase].append(value)
+        self.samples["total"].append(total)
+
+        # у файл - мілісекунди
+        if self.file:
+            if self.jsonl:
+                row = {"frame": self.frame}
+                row.update((phase, round(value * 1000, 4)) for phase, value in self.current.items())
+                row["total"] = round(total * 1000, 4)
+                self.file.write(json.dumps(row) + "\n")
+            else:
+                values = [f"{self.current[phase] * 1000:.4f}" for phase in PHASES]
+                self.file.write(f"{self.frame},{','.join(values)},{total * 1000:.4f}\n")
+
+        if self.frame % REFRESH == 0:
+            self.stats = self.percentiles()
+
+    # фаза -> (p50, p95, p99) у мілісекундах
+    def percentiles(self):
+        stats = {}
+        for phase, values in self.samples.items():
+            if values:
+                ordered = sorted(values)
+                stats[phase] = tuple(percentile(ordered, q) * 1000 for q in (0.5, 0.95, 0.99))
+        return stats
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
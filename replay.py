@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import time
+import pygame
+
+from game import Game
+from simulation import PressedKeys
+
+# Клавіші, стан яких пишемо кожен тік (порядок = номер біта в масці)
+RECORDED_KEYS = (
+    pygame.K_w, pygame.K_UP,
+    pygame.K_s, pygame.K_DOWN,
+    pygame.K_a, pygame.K_LEFT,
+    pygame.K_d, pygame.K_RIGHT,
+)
+
+
+def keys_to_mask(keys):
+    mask = 0
+    for bit, key in enumerate(RECORDED_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+
+def mask_to_keys(mask):
+    return PressedKeys(key for bit, key in enumerate(RECORDED_KEYS) if mask & (1 << bit))
+
+
+# Пише ввід кожної ігрової сесії (від старту з меню до повернення в меню) у JSON
+class InputRecorder:
+    def __init__(self, folder):
+        self.folder = folder
+        self.active = False
+        self.header = None
+        self.ticks = []
+
+    def start(self, game):
+        self.active = True
+        self.ticks = []
+        self.header = {
+            "seed": game.session_seed,
+            "game_mode": game.game_mode,
+            "difficulty": game.selected_difficulty,
+            "campaign_level_num": game.campaign_level_num,
+            "default_level_num": game.default_level_num,
+        }
+
+    def record(self, keys, shoot):
+        self.ticks.append([keys_to_mask(keys), int(shoot)])
+
+    def finish(self, game):
+        self.active = False
+
+        # вихід посеред GAME_OVER чи ROUND_CLEAR: куди вів перехід, щоб replay зупинився на ньому ж
+        in_transition = game.state in ("GAME_OVER", "ROUND_CLEAR")
+        self.header["transition"] = game.transition_then if in_transition else None
+
+        os.makedirs(self.folder, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{self.header['seed']}.json"
+        path = os.path.join(self.folder, name)
+
+        data = {
+            "header": self.header,
+            "ticks": self.ticks,
+            "final_state": game.get_state(),
+        }
+
+        try:
+            with open(path, "w") as f:
+                json.dump(data, f)
+        except Exception as e:
+            print(f"Помилка при збереженні запису: {e}")
+
+        return path
+
+
+# Програє запис у headless-грі без обмеження FPS і повертає гру в кінцевому стані
+def replay(data):
+    header = data["header"]
+
+    game = Game(headless=True, seed=header["seed"])
+    game.game_mode = header["game_mode"]
+    game.selected_difficulty = header["difficulty"]
+    game.campaign_level_num = header["campaign_level_num"]
+    game.default_level_num = header["default_level_num"]
+
+    game.begin_session()
+
+    ticks = data["ticks"]
+    for i, (mask, shoot) in enumerate(ticks):
+        # останній тік почав перехід, який у записі так і не завершився
+        if i == len(ticks) - 1 and header.get("transition"):
+            game.hold_transitions = True
+        game.step(mask_to_keys(mask), bool(shoot))
+
+    return game
+
+
+# JSON-кругообіг, щоб кортежі порівнювались зі збереженими списками.
+# Поле state не порівнюємо: вихід у меню через ESC не є ігровим тіком і не пишеться
+def states_match(game, data):
+    final_state = json.loads(json.dumps(game.get_state()))
+    expected = dict(data["final_state"])
+
+    final_state.pop("state")
+    expected.pop("state")
+    return final_state == expected
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Використання: python replay.py <запис.json> [...]")
+        sys.exit(1)
+
+    failed = False
+
+    for path in sys.argv[1:]:
+        with open(path) as f:
+            data = json.load(f)
+
+        start = time.perf_counter()
+        game = replay(data)
+        elapsed = time.perf_counter() - start
+
+        ticks = len(data["ticks"])
+        ok = states_match(game, data)
+        failed = failed or not ok
+
+        print(f"{path}: {ticks} тіків за {elapsed:.3f} с "
+              f"({ticks / max(elapsed, 1e-9):.0f} тік/с), стан {'збігається' if ok else 'НЕ ЗБІГАЄТЬСЯ'}")
+
+    sys.exit(1 if failed else 0)
@@ -1,9 +1,14 @@
 # save_manager.py
+import copy
 import json
 import os
+import threading
 
 SAVE_FILE = "save_data.json"
 
+# Через скільки секунд після останньої зміни фоновий потік пише файл
+SAVE_DELAY = 1.0
+
 # Структура за замовчуванням 
 DEFAULT_DATA = {
     "stats": {
@@ -25,30 +30,124 @@ DEFAULT_DATA = {
     }
 }
 
-def load_data():
+# Профіль живе в пам'яті: читання - з нього, зміни позначають його брудним,
+# а потік save-writer записує файл після паузи SAVE_DELAY і при закритті гри
+data = None
+version = 0
+saved_version = 0
+lock = threading.Condition()
+writer = None
+running = False
+
+
+def read_file():
     if not os.path.exists(SAVE_FILE):
-        return DEFAULT_DATA.copy()
-    
-    with open(SAVE_FILE, "r") as file_path:
-        data = json.load(file_path)
-            
-        if "stats" not in data: 
-            data["stats"] = DEFAULT_DATA["stats"].copy()
-        if "campaign_progress" not in data: 
-            data["campaign_progress"] = DEFAULT_DATA["campaign_progress"].copy()
+        return copy.deepcopy(DEFAULT_DATA)
+
+    try:
+        with open(SAVE_FILE, "r") as file_path:
+            data = json.load(file_path)
+    except (OSError, ValueError) as e:
+        print(f"Помилка при читанні даних: {e}")
+        return copy.deepcopy(DEFAULT_DATA)
+
+    if "stats" not in data:
+        data["stats"] = DEFAULT_DATA["stats"].copy()
+    if "campaign_progress" not in data:
+        data["campaign_progress"] = DEFAULT_DATA["campaign_progress"].copy()
 
-        if "classic_progress" not in data: 
-            data["classic_progress"] = DEFAULT_DATA["classic_progress"].copy()
+    if "classic_progress" not in data:
+        data["classic_progress"] = DEFAULT_DATA["classic_progress"].copy()
 
+    return data
+
+
+def load_data():
+    global data
+    with lock:
+        if data is None:
+            data = read_file()
         return data
 
-def save_data(data):
+
+# Запис через тимчасовий файл і rename: обірваний запис не псує попереднє збереження
+def write_file(text):
+    tmp = SAVE_FILE + ".tmp"
     try:
-        with open(SAVE_FILE, "w") as f:
-            json.dump(data, f, indent=4)
+        with open(tmp, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, SAVE_FILE)
     except Exception as e:
         print(f"Помилка при збереженні даних: {e}")
 
+
+# Записує профіль, якщо є незбережені зміни
+def flush():
+    global saved_version
+    with lock:
+        if data is None or version == saved_version:
+            return
+        text = json.dumps(data, indent=4)
+        current = version
+
+    write_file(text)
+
+    with lock:
+        saved_version = max(saved_version, current)
+
+
+def writer_loop():
+    while True:
+        with lock:
+            while running and version == saved_version:
+                lock.wait()
+            if not running:
+                return
+
+            # чекаємо, поки зміни вщухнуть, щоб злити їх в один запис
+            seen = version
+            while running:
+                lock.wait(SAVE_DELAY)
+                if version == seen:
+                    break
+                seen = version
+
+        flush()
+
+
+def mark_dirty():
+    global version, writer, running
+    with lock:
+        version += 1
+        if writer is None:
+            running = True
+            writer = threading.Thread(target=writer_loop, name="save-writer", daemon=True)
+            writer.start()
+        lock.notify_all()
+
+
+# Зупиняє фоновий запис і дописує останні зміни; викликати при виході з гри
+def close():
+    global writer, running
+    with lock:
+        running = False
+        lock.notify_all()
+        thread = writer
+        writer = None
+
+    if thread is not None:
+        thread.join()
+    flush()
+
+
+def save_data(new_data):
+    global data
+    with lock:
+        data = new_data
+    mark_dirty()
+
 def update_progress(game_mode, difficulty, level_num):
 
     data = load_data()
@@ -58,18 +157,13 @@ def update_progress(game_mode, difficulty, level_num):
     else:
         dict_key = "campaign_progress"
     
-    current_best = data[dict_key].get(difficulty, 1)
-    
-    if level_num > current_best:
+    with lock:
+        current_best = data[dict_key].get(difficulty, 1)
+
+        if level_num <= current_best:
+            return False
+
         data[dict_key][difficulty] = level_num
-        save_data(data)
-        return True
-        
-    return False
 
-def add_stats(kills=0, deaths=0, games=0):
-    data = load_data()
-    data["stats"]["total_kills"] += kills
-    data["stats"]["deaths"] += deaths
-    data["stats"]["total_games"] += games
-    save_data(data)
\ No newline at end of file
+    mark_dirty()
+    return True
@@ -1,11 +1,18 @@
 # settings.py
 TILE = 40
+# Розмір мапи за замовчуванням (рівні з файлів мають власний розмір)
 COLS = 17
 ROWS = 17
+# Скільки клітинок видно на екрані; більші мапи прокручуються камерою за гравцем
+VIEW_COLS = 17
+VIEW_ROWS = 17
+# Розмір згенерованих аркадних мап
+ARCADE_COLS = COLS
+ARCADE_ROWS = ROWS
 HUD_WIDTH = 250
 
-WIDTH = COLS * TILE + HUD_WIDTH
-HEIGHT = ROWS * TILE
+WIDTH = VIEW_COLS * TILE + HUD_WIDTH
+HEIGHT = VIEW_ROWS * TILE
 
 BG_COLOR = 'black'
 BULLET_COLOR = (255, 230, 80)
@@ -13,6 +20,10 @@ HUD_TEXT_COLOR = (255, 255, 255)
 HUD_BG_COLOR = (20, 20, 20)
 
 FPS = 60
+# Оновлювати на екрані лише змінені прямокутники замість повного flip
+DIRTY_RECTS = True
+# Скільки готових аркадних мап фоновий потік тримає наперед (0 - генерувати на місці)
+LEVEL_POOL_SIZE = 3
 BULLET_SPEED = 0.25
 # BULLET_COLOR = (255, 230, 80)
 
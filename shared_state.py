@@ -0,0 +1,237 @@
+import os
+import sys
+import time
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from settings import COLS, ROWS, ARCADE_COLS, ARCADE_ROWS
+from tiles import TILE_STEEL
+from world import DIRECTION_CODES
+from vec_env import MAX_ENEMIES, MAX_BULLETS, ENEMY_FIELDS, BULLET_FIELDS, write_enemies, write_bullets
+
+# Змінюється разом зі структурою блоку: читач зі старою версією не підключиться
+LAYOUT_VERSION = 2
+
+# Заголовок (int64): лічильник seqlock, розміри, з яких читач будує вигляди, і трекер видавця
+HEADER_FIELDS = ("seq", "layout", "cols", "rows", "max_enemies", "max_bullets", "tracker")
+HUD_FIELDS = (
+    "enemy_counter", "lives", "hp", "player_x", "player_y", "player_direction",
+    "enemy_count", "bullet_count", "level_cols", "level_rows", "base_alive", "tick", "tiles_version",
+)
+HUD = {name: i for i, name in enumerate(HUD_FIELDS)}
+SEQ = 0
+
+
+def align(offset):
+    return (offset + 7) & ~7
+
+
+# resource_tracker цього процесу як inode його каналу. Дочірні процеси multiprocessing (fork і spawn)
+# успадковують канал батька, тож спільний трекер дає той самий inode. Канал - приватне поле трекера
+# (є до Python 3.13, де воно й потрібне); якщо його немає, повертає None - "невідомо"
+def tracker_id():
+    tracker = getattr(resource_tracker, "_resource_tracker", None)
+    fd = getattr(tracker, "_fd", None)
+    if not isinstance(fd, int):
+        return None
+    try:
+        return os.fstat(fd).st_ino
+    except OSError:
+        return None
+
+
+# Розкладка блоку: header | hud | tiles (rows x cols) | enemies | bullets.
+# Повертає NumPy-вигляди на buf - без копій
+def layout_views(buf, cols, rows, max_enemies, max_bullets):
+    shapes = (
+        ("header", np.int64, (len(HEADER_FIELDS),)),
+        ("hud", np.int32, (len(HUD_FIELDS),)),
+        ("tiles", np.uint8, (rows, cols)),
+        ("enemies", np.int32, (max_enemies, len(ENEMY_FIELDS))),
+        ("bullets", np.float32, (max_bullets, len(BULLET_FIELDS))),
+    )
+
+    views = {}
+    offset = 0
+    for name, dtype, shape in shapes:
+        count = int(np.prod(shape))
+        if buf is not None:
+            views[name] = np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+        offset = align(offset + count * np.dtype(dtype).itemsize)
+    return views, offset
+
+
+# Пише стан гри у блок спільної пам'яті з фіксованою розкладкою. Запис оточений seqlock:
+# seq непарний - запис триває, парний - стан цілісний. Читачі нічого не десеріалізують,
+# а дивляться на ті самі байти через NumPy-вигляди (SharedStateReader).
+# cols x rows - місткість сітки: за замовчуванням найбільша з мап за замовчуванням і аркадних;
+# для більших рівнів з файлів її треба задати явно
+class SharedStatePublisher:
+    def __init__(self, name=None, cols=max(COLS, ARCADE_COLS), rows=max(ROWS, ARCADE_ROWS),
+                 max_enemies=MAX_ENEMIES, max_bullets=MAX_BULLETS):
+        _, size = layout_views(None, cols, rows, max_enemies, max_bullets)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = self.shm.name
+
+        views, _ = layout_views(self.shm.buf, cols, rows, max_enemies, max_bullets)
+        self.header = views["header"]
+        self.hud = views["hud"]
+        self.tiles = views["tiles"]
+        self.enemies = views["enemies"]
+        self.bullets = views["bullets"]
+
+        self.header[:] = (0, LAYOUT_VERSION, cols, rows, max_enemies, max_bullets, tracker_id() or 0)
+        self.hud[:] = 0
+        self.tiles[:] = TILE_STEEL
+        self.enemies[:] = -1
+        self.bullets[:] = 0
+
+        # сітку переписуємо лише після змін (level.version)
+        self.level = None
+        self.level_version = None
+
+    def publish(self, game, tick=0):
+        header = self.header
+        hud = self.hud
+        level = game.level
+        player = game.player
+
+        new_tiles = level is not self.level or level.version != self.level_version
+        rows, cols = level.rows, level.cols
+        if new_tiles and (rows > self.tiles.shape[0] or cols > self.tiles.shape[1]):
+            raise ValueError(
+                f"Мапа {cols}x{rows} не вміщується у блок спільної пам'яті "
+                f"{self.tiles.shape[1]}x{self.tiles.shape[0]}"
+            )
+
+        header[SEQ] += 1
+
+        if new_tiles:
+            self.level = level
+            self.level_version = level.version
+            # за межами мапи - сталь, як у спостереженнях VecEnv
+            tiles = self.tiles
+            tiles[rows:, :] = TILE_STEEL
+            tiles[:rows, cols:] = TILE_STEEL
+            tiles[:rows, :cols] = level.tile_array
+            hud[HUD["level_cols"]] = cols
+            hud[HUD["level_rows"]] = rows
+            hud[HUD["tiles_version"]] += 1
+
+        hud[HUD["enemy_counter"]] = game.enemy_counter
+        hud[HUD["lives"]] = player.lives
+        hud[HUD["hp"]] = player.hp
+        hud[HUD["player_x"]] = player.x
+        hud[HUD["player_y"]] = player.y
+        hud[HUD["player_direction"]] = DIRECTION_CODES[player.direction]
+        hud[HUD["base_alive"]] = -1 if game.base is None else game.base.alive
+        hud[HUD["tick"]] = tick
+
+        hud[HUD["enemy_count"]] = write_enemies(game.world, self.enemies, hud[HUD["enemy_count"]])
+        hud[HUD["bullet_count"]] = write_bullets(game.bullets, self.bullets, hud[HUD["bullet_count"]])
+
+        header[SEQ] += 1
+
+    def close(self):
+        self.header = self.hud = self.tiles = self.enemies = self.bullets = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+# Читач блоку за ім'ям. tiles, enemies, bullets, hud - вигляди прямо на спільну пам'ять.
+# Цілісне читання: seq = begin(), прочитати потрібне, і якщо changed(seq) - повторити.
+# Блок належить видавцю, і прибрати його (зокрема після падіння видавця) має трекер видавця.
+# Читач може бути окремим процесом зі своїм resource_tracker або дочірнім процесом multiprocessing
+# (fork чи spawn) видавця чи їхнього спільного батька - тоді трекер у них спільний
+class SharedStateReader:
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+            tracked = False
+        except TypeError:
+            # до Python 3.13 track немає: підключення реєструє блок у трекері цього процесу
+            self.shm = shared_memory.SharedMemory(name=name)
+            tracked = os.name == "posix"
+
+        header = np.ndarray((len(HEADER_FIELDS),), dtype=np.int64, buffer=self.shm.buf)
+
+        # Власний трекер прибрав би чужий блок, коли читач завершиться, - знімаємо реєстрацію.
+        # Спільний з видавцем не чіпаємо: unregister стер би реєстрацію самого видавця.
+        # Якщо трекер не розпізнати, знімаємо: гірше, коли читач видалить блок живого видавця
+        if tracked:
+            own = tracker_id()
+            if own is None or own != header[HEADER_FIELDS.index("tracker")]:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+
+        if header[1] != LAYOUT_VERSION:
+            layout = int(header[1])
+            self.shm.close()
+            raise ValueError(f"Невідома версія розкладки спільної пам'яті: {layout}")
+
+        _, _, cols, rows, max_enemies, max_bullets, _ = header.tolist()
+        views, _ = layout_views(self.shm.buf, cols, rows, max_enemies, max_bullets)
+        self.header = views["header"]
+        self.hud = views["hud"]
+        self.tiles = views["tiles"]
+        self.enemies = views["enemies"]
+        self.bullets = views["bullets"]
+
+    @property
+    def seq(self):
+        return int(self.header[SEQ])
+
+    # Чекає, поки видавець не посеред запису; повертає seq, з яким порівнювати в changed
+    def begin(self):
+        while True:
+            seq = int(self.header[SEQ])
+            if not seq & 1:
+                return seq
+
+    def changed(self, seq):
+        return int(self.header[SEQ]) != seq
+
+    # Чекає нового стану після seq; повертає новий seq або None, якщо вийшов timeout
+    def wait(self, seq, timeout=None, poll=0.001):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self.begin()
+            if current != seq:
+                return current
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(poll)
+
+    # Цілісні лічильники HUD як словник (для логів і моніторингу; копіює)
+    def counters(self):
+        while True:
+            seq = self.begin()
+            values = self.hud.tolist()
+            if not self.changed(seq):
+                return dict(zip(HUD_FIELDS, values))
+
+    def close(self):
+        self.header = self.hud = self.tiles = self.enemies = self.bullets = None
+        self.shm.close()
+
+
+if __name__ == "__main__":
+    # python shared_state.py ІМ'Я - друкує лічильники HUD при кожному новому стані
+    if len(sys.argv) < 2:
+        print("Використання: python shared_state.py ІМ'Я_БЛОКУ")
+        sys.exit(1)
+
+    reader = SharedStateReader(sys.argv[1])
+    seq = None
+    try:
+        while True:
+            seq = reader.wait(seq, timeout=5)
+            if seq is None:
+                print("Видавець мовчить 5 с")
+                break
+            c = reader.counters()
+            print(f"тік {c['tick']}: вбито {c['enemy_counter']}, життів {c['lives']}, HP {c['hp']}, ворогів {c['enemy_count']}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
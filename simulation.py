@@ -0,0 +1,53 @@
+from game import Game
+
+
+# Замінник pygame.key.get_pressed() для headless-режиму
+class PressedKeys:
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+NO_KEYS = PressedKeys()
+
+
+# Світ гри без вікна: створити, прогнати N тіків, прочитати стан
+class Simulation:
+    # preset - заміни значень у Game.difficulty_presets[difficulty] на цю сесію
+    def __init__(self, game_mode="ARCADE", difficulty="NORMAL", level_num=1, seed=None, preset=None):
+        self.game = Game(headless=True, seed=seed)
+        self.game.game_mode = game_mode
+        self.game.selected_difficulty = difficulty
+        if preset:
+            self.game.difficulty_presets[difficulty].update(preset)
+        self.game.campaign_level_num = level_num
+        self.game.default_level_num = level_num
+
+        self.ticks = 0
+        self.game.begin_session()
+
+    @property
+    def done(self):
+        return self.game.state != "PLAY"
+
+    def step(self, ticks=1, keys=NO_KEYS, shoot=False):
+        for _ in range(ticks):
+            if self.done:
+                break
+
+            self.game.step(keys, shoot)
+            self.ticks += 1
+
+        return self.done
+
+    def run(self, max_ticks):
+        while not self.done and self.ticks < max_ticks:
+            self.step()
+        return self.ticks
+
+    def get_state(self):
+        state = self.game.get_state()
+        state["tick"] = self.ticks
+        return state
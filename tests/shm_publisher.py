@@ -0,0 +1,40 @@
+import os
+import sys
+import multiprocessing
+
+from shared_state import SharedStatePublisher, SharedStateReader
+
+
+# Читач на рівні модуля, щоб spawn міг його знайти
+def read(name):
+    reader = SharedStateReader(name)
+    reader.counters()
+    reader.close()
+
+
+# Видавець у власному процесі: дочірні читачі (fork і spawn) ділять із ним resource_tracker.
+# mode - "close" (прибрати блок) або "crash" (вийти без close)
+def publish(name, mode):
+    publisher = SharedStatePublisher(name)
+    for method in ("fork", "spawn"):
+        reader = multiprocessing.get_context(method).Process(target=read, args=(publisher.name,))
+        reader.start()
+        reader.join()
+        if reader.exitcode:
+            sys.exit(1)
+
+    # сторонній читач (окремий процес зі своїм трекером) підключається, поки видавець чекає
+    print("ready", flush=True)
+    sys.stdin.readline()
+
+    if mode == "crash":
+        os._exit(0)
+    publisher.close()
+
+
+# python shm_publisher.py ІМ'Я close|crash - видавець; python shm_publisher.py ІМ'Я read - сторонній читач
+if __name__ == "__main__":
+    if sys.argv[2] == "read":
+        read(sys.argv[1])
+    else:
+        publish(sys.argv[1], sys.argv[2])
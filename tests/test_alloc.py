@@ -0,0 +1,39 @@
+import tracemalloc
+
+from simulation import Simulation
+from agent import ScriptedAgent
+
+# Скільки тіків гратися і на скільки блоків може вирости пам'ять за цей час
+ALLOC_TICKS = 20000
+ALLOC_MAX_BLOCKS = 200
+
+
+# Довга сесія під tracemalloc: після розігріву кількість живих блоків пам'яті не повинна рости.
+# Гравець безсмертний, тож гра йде раунд за раундом без перезапуску
+def test_long_session_does_not_grow_memory():
+    agent = ScriptedAgent(1)
+    sim = Simulation("ARCADE", "NORMAL", seed=1)
+    game = sim.game
+
+    def play(n):
+        for _ in range(n):
+            game.player.invincible = 2
+            keys, shoot = agent.act(game)
+            game.step(keys, shoot)
+
+    # розігрів теж під tracemalloc, щоб звільнення старих об'єктів було видно в різниці
+    tracemalloc.start()
+    try:
+        play(3000)
+        start = tracemalloc.take_snapshot()
+        play(ALLOC_TICKS)
+        end = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = end.compare_to(start, "lineno")
+    blocks = sum(stat.count_diff for stat in diff)
+    top = "\n".join(str(stat) for stat in diff[:5] if stat.count_diff)
+
+    assert game.state == "PLAY"
+    assert blocks <= ALLOC_MAX_BLOCKS, f"{blocks:+d} блоків за {ALLOC_TICKS} тіків:\n{top}"
@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import subprocess
+from multiprocessing import shared_memory, resource_tracker
+
+import pytest
+
+from conftest import ROOT
+
+HELPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shm_publisher.py")
+
+
+def shm_exists(name):
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    # перевірка не повинна ні реєструвати, ні прибирати блок
+    resource_tracker.unregister(shm._name, "shared_memory")
+    shm.close()
+    return True
+
+
+# Читачі не ламають прибирання блоку видавцем (close) і його трекером (після падіння видавця),
+# а сторонній читач не прибирає чужий блок при виході
+@pytest.mark.parametrize("mode", ["close", "crash"])
+def test_readers_keep_publisher_cleanup(mode):
+    name = f"bc_test_{os.getpid()}_{mode}"
+    env = dict(os.environ, PYTHONPATH=ROOT)
+
+    publisher = subprocess.Popen(
+        [sys.executable, HELPER, name, mode],
+        cwd=ROOT, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    try:
+        ready = publisher.stdout.readline().strip() == "ready"
+
+        outsider = subprocess.run(
+            [sys.executable, HELPER, name, "read"], cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+        alive = shm_exists(name)
+
+        _, errors = publisher.communicate("\n", timeout=30)
+    finally:
+        if publisher.poll() is None:
+            publisher.kill()
+
+    # трекер видавця прибирає покинутий блок, коли завершується останній процес з ним
+    deadline = time.monotonic() + 5
+    while shm_exists(name) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    assert ready, errors
+    assert outsider.returncode == 0, outsider.stderr
+    assert alive
+    assert not shm_exists(name)
+    assert "KeyError" not in errors, errors
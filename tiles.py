@@ -0,0 +1,32 @@
+import numpy as np
+
+from settings import GRASS, STEEL, BRICK, WATER, EMPTY, TILE_TYPES
+
+# Коди клітинок - ключі TILE_TYPES
+TILE_IDS = {info["name"]: code for code, info in TILE_TYPES.items()}
+
+TILE_EMPTY = TILE_IDS["empty"]
+TILE_BRICK = TILE_IDS["brick"]
+TILE_STEEL = TILE_IDS["steel"]
+TILE_WATER = TILE_IDS["water"]
+TILE_GRASS = TILE_IDS["grass"]
+
+CHAR_TO_TILE = {EMPTY: TILE_EMPTY, BRICK: TILE_BRICK, STEEL: TILE_STEEL, WATER: TILE_WATER, GRASS: TILE_GRASS}
+TILE_TO_CHAR = {code: char for char, code in CHAR_TO_TILE.items()}
+
+# Таблиці властивостей за кодом клітинки: bytes для одиничних запитів, NumPy - для векторних
+WALKABLE = bytes(TILE_TYPES[code]["walkable"] for code in range(len(TILE_TYPES)))
+STOPS_BULLET = bytes(TILE_TYPES[code]["stops_bullet"] for code in range(len(TILE_TYPES)))
+DESTRUCTIBLE = bytes(TILE_TYPES[code]["destructible"] for code in range(len(TILE_TYPES)))
+
+WALKABLE_MASK = np.frombuffer(WALKABLE, dtype=np.uint8).astype(bool)
+STOPS_BULLET_MASK = np.frombuffer(STOPS_BULLET, dtype=np.uint8).astype(bool)
+DESTRUCTIBLE_MASK = np.frombuffer(DESTRUCTIBLE, dtype=np.uint8).astype(bool)
+
+# Символи ворогів у рядку ENEMIES: файлів рівнів
+ENEMY_CHARS = {
+    'b': 'BASIC',
+    'f': 'FAST',
+    'a': 'ARMOR',
+    's': 'SNIPER'
+}
@@ -0,0 +1,193 @@
+import random
+
+import numpy as np
+
+from settings import COLS, ROWS, ARCADE_COLS, ARCADE_ROWS
+from tiles import TILE_STEEL
+from simulation import Simulation, PressedKeys
+from agent import DIRECTION_KEYS
+from world import ENTITY_ENEMY, DIRECTION_NAMES, DIRECTION_CODES
+
+# Дія руху: -1 - стояти, інакше код напрямку як у world.DIRECTION_CODES
+MOVE_NONE = -1
+# Готові "натиснуті клавіші" для кожної дії, індекс - код руху + 1
+ACTION_KEYS = (PressedKeys(),) + tuple(PressedKeys([DIRECTION_KEYS[name]]) for name in DIRECTION_NAMES)
+
+# Скільки ворогів і куль потрапляє у спостереження; решта відкидається
+MAX_ENEMIES = 32
+MAX_BULLETS = 64
+
+# Стовпці масивів спостереження
+PLAYER_FIELDS = ("x", "y", "direction", "hp", "lives")
+ENEMY_FIELDS = ("x", "y", "direction", "type", "hp")
+BULLET_FIELDS = ("x", "y", "dx", "dy", "owner")
+HUD_FIELDS = ("enemy_counter", "enemies_left", "base_alive", "tick")
+
+REWARD_KILL = 1.0
+REWARD_DEATH = -1.0
+REWARD_WIN = 5.0
+REWARD_LOSS = -5.0
+
+# Результат завершеного епізоду в outcome
+OUTCOME_NONE = 0
+OUTCOME_WIN = 1
+OUTCOME_LOSS = -1
+OUTCOME_TIMEOUT = 2
+
+
+# Вороги у рядки out (ENEMY_FIELDS); prev - скільки рядків було заповнено минулого разу:
+# зайві рядки затираються лише там, де щось було. Повертає кількість записаних
+def write_enemies(world, out, prev):
+    idx = world.indices(ENTITY_ENEMY)[:len(out)]
+    n = len(idx)
+    out[:n, 0] = world.x[idx]
+    out[:n, 1] = world.y[idx]
+    out[:n, 2] = world.direction[idx]
+    out[:n, 3] = world.type[idx]
+    out[:n, 4] = world.hp[idx]
+    out[n:prev] = -1
+    return n
+
+
+# Активні кулі у рядки out (BULLET_FIELDS), як write_enemies
+def write_bullets(bullets, out, prev):
+    # кулі, що влучили за цей тік, ще лежать у масивах до наступного стиснення
+    idx = bullets.active[:bullets.count].nonzero()[0][:len(out)]
+    n = len(idx)
+    out[:n, 0] = bullets.x[idx]
+    out[:n, 1] = bullets.y[idx]
+    out[:n, 2] = bullets.dx[idx]
+    out[:n, 3] = bullets.dy[idx]
+    out[:n, 4] = bullets.owner[idx]
+    out[n:prev] = 0
+    return n
+
+
+# N незалежних headless-ігор, які крокують разом. step(moves, fire) приймає масиви дій
+# (рух як у Player.handle_input, постріл як Game.player_shoot) і повертає (obs, rewards, dones) -
+# ті самі заздалегідь виділені масиви, що перезаписуються щокроку. Завершений епізод одразу
+# перезапускається з новим seed, тож obs у цьому рядку - вже перший стан нового епізоду,
+# а чим закінчився старий - у outcome
+class VecEnv:
+    def __init__(self, num_envs, game_mode="ARCADE", difficulty="NORMAL", level_num=1, seed=0,
+                 max_ticks=60 * 60 * 5, preset=None):
+        self.num_envs = num_envs
+        self.max_ticks = max_ticks
+        self.rng = random.Random(seed)
+
+        self.sims = [
+            Simulation(game_mode, difficulty, level_num, seed=self.rng.randrange(2**32), preset=preset)
+            for _ in range(num_envs)
+        ]
+
+        # Мапи різного розміру вписуються в одну сітку; за межами мапи - сталь
+        if game_mode == "ARCADE":
+            self.rows, self.cols = ARCADE_ROWS, ARCADE_COLS
+        else:
+            self.rows, self.cols = ROWS, COLS
+
+        self.obs = {
+            "tiles": np.full((num_envs, self.rows, self.cols), TILE_STEEL, dtype=np.uint8),
+            "player": np.zeros((num_envs, len(PLAYER_FIELDS)), dtype=np.int32),
+            "enemies": np.full((num_envs, MAX_ENEMIES, len(ENEMY_FIELDS)), -1, dtype=np.int32),
+            "enemy_count": np.zeros(num_envs, dtype=np.int32),
+            "bullets": np.zeros((num_envs, MAX_BULLETS, len(BULLET_FIELDS)), dtype=np.float32),
+            "bullet_count": np.zeros(num_envs, dtype=np.int32),
+            "hud": np.zeros((num_envs, len(HUD_FIELDS)), dtype=np.int32),
+        }
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.outcome = np.zeros(num_envs, dtype=np.int8)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+
+        # з чим порівнювати на наступному кроці
+        self.kills = np.zeros(num_envs, dtype=np.int32)
+        self.lives = np.zeros(num_envs, dtype=np.int32)
+        # тайли копіюються лише після змін сітки (level.version)
+        self.tile_versions = [None] * num_envs
+
+    def reset(self):
+        for i in range(self.num_envs):
+            self.reset_env(i)
+            self.write_obs(i)
+        self.rewards[:] = 0
+        self.dones[:] = False
+        self.outcome[:] = OUTCOME_NONE
+        return self.obs
+
+    def reset_env(self, i):
+        game = self.sims[i].game
+        game.seed = self.rng.randrange(2**32)
+        game.begin_session()
+
+        self.ticks[i] = 0
+        self.kills[i] = 0
+        self.lives[i] = game.player.lives
+        self.tile_versions[i] = None
+
+    # moves - коди руху (MOVE_NONE або напрямок), fire - чи стріляти
+    def step(self, moves, fire):
+        moves = moves.tolist()
+        fire = fire.tolist()
+
+        for i, sim in enumerate(self.sims):
+            game = sim.game
+            game.step(ACTION_KEYS[moves[i] + 1], fire[i])
+            self.ticks[i] += 1
+
+            run = game.last_run
+            if run is None:
+                kills = game.enemy_counter
+                lives = game.player.lives
+                reward = (kills - self.kills[i]) * REWARD_KILL + (self.lives[i] - lives) * REWARD_DEATH
+                self.kills[i] = kills
+                self.lives[i] = lives
+
+                timeout = self.ticks[i] >= self.max_ticks
+                self.rewards[i] = reward
+                self.dones[i] = timeout
+                self.outcome[i] = OUTCOME_TIMEOUT if timeout else OUTCOME_NONE
+            else:
+                # після перемоги гра вже на наступному рівні, тож вбивства беремо з підсумку забігу
+                kills = sum(run["kills_by_type"].values())
+                win = run["result"] == "WIN"
+                self.rewards[i] = (kills - self.kills[i]) * REWARD_KILL + (REWARD_WIN if win else REWARD_LOSS)
+                self.dones[i] = True
+                self.outcome[i] = OUTCOME_WIN if win else OUTCOME_LOSS
+
+            if self.dones[i]:
+                self.reset_env(i)
+            self.write_obs(i)
+
+        return self.obs, self.rewards, self.dones
+
+    def write_obs(self, i):
+        obs = self.obs
+        game = self.sims[i].game
+        level = game.level
+        player = game.player
+
+        if self.tile_versions[i] != level.version:
+            self.tile_versions[i] = level.version
+            rows = min(level.rows, self.rows)
+            cols = min(level.cols, self.cols)
+            tiles = obs["tiles"][i]
+            tiles[rows:, :] = TILE_STEEL
+            tiles[:rows, cols:] = TILE_STEEL
+            tiles[:rows, :cols] = level.tile_array[:rows, :cols]
+
+        row = obs["player"][i]
+        row[0] = player.x
+        row[1] = player.y
+        row[2] = DIRECTION_CODES[player.direction]
+        row[3] = player.hp
+        row[4] = player.lives
+
+        obs["enemy_count"][i] = write_enemies(game.world, obs["enemies"][i], obs["enemy_count"][i])
+        obs["bullet_count"][i] = write_bullets(game.bullets, obs["bullets"][i], obs["bullet_count"][i])
+
+        hud = obs["hud"][i]
+        hud[0] = game.enemy_counter
+        hud[1] = game.MAX_ENEMIES_PER_LEVEL - game.enemy_counter
+        hud[2] = -1 if game.base is None else game.base.alive
+        hud[3] = self.ticks[i]
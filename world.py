@@ -0,0 +1,178 @@
+import numpy as np
+import pygame
+
+from settings import TILE
+
+# Види сутностей у світі
+ENTITY_ENEMY = 1
+ENTITY_EXPLOSION = 2
+ENTITY_BONUS = 3
+
+# Напрямок зберігається кодом - індексом у DIRECTION_NAMES
+DIRECTION_NAMES = ("UP", "DOWN", "LEFT", "RIGHT")
+DIRECTION_CODES = {name: code for code, name in enumerate(DIRECTION_NAMES)}
+DX = np.array([0, 0, -1, 1], dtype=np.int32)
+DY = np.array([-1, 1, 0, 0], dtype=np.int32)
+
+FIELDS = (
+    "kind", "type", "x", "y", "direction", "hp",
+    "move_timer", "shoot_timer", "invincible", "lifetime", "alive",
+)
+
+
+# Усі сутності гри, крім гравця і куль, в одному наборі масивів-компонентів: рядок i - одна сутність.
+# type - код типу всередині виду (тип ворога, бонусу), lifetime - скільки тіків лишилось вибуху чи бонусу.
+# Системи (поведінка в enemies/enemy.py, explosion.py, bonus.py) обробляють цілі стовпці за тік;
+# мертві сутності прибирає compact зі збереженням порядку.
+# cells - хто стоїть у якій клітинці: куля чи гравець шукають ціль одним зверненням до словника,
+# а не маскою по всіх сутностях. Позиції змінюються лише через spawn і move, щоб індекс не відставав
+class World:
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.cells = {}
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.type = np.zeros(capacity, dtype=np.int8)
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.hp = np.zeros(capacity, dtype=np.int16)
+        # швидкість ворогів буває дробовою (ENEMY_MOVE_DELAY = 22.5)
+        self.move_timer = np.zeros(capacity, dtype=np.float64)
+        self.shoot_timer = np.zeros(capacity, dtype=np.int32)
+        self.invincible = np.zeros(capacity, dtype=np.int32)
+        self.lifetime = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+        self.cells = {}
+
+    def grow(self):
+        capacity = len(self.x) * 2
+        for name in FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    # Новий рядок; решту компонентів задає той, хто створює сутність
+    def spawn(self, kind, x, y, type_code=0):
+        if self.count == len(self.x):
+            self.grow()
+
+        i = self.count
+        self.kind[i] = kind
+        self.type[i] = type_code
+        self.x[i] = x
+        self.y[i] = y
+        self.direction[i] = 0
+        self.hp[i] = 0
+        self.move_timer[i] = 0
+        self.shoot_timer[i] = 0
+        self.invincible[i] = 0
+        self.lifetime[i] = 0
+        self.alive[i] = True
+        self.count += 1
+        self.cells.setdefault((int(x), int(y)), []).append(i)
+        return i
+
+    # Переставляє сутності idx у клітинки (x, y) - масиви тієї ж довжини
+    def move(self, idx, x, y):
+        cells = self.cells
+        for i, old_x, old_y, new_x, new_y in zip(
+            idx.tolist(), self.x[idx].tolist(), self.y[idx].tolist(), x.tolist(), y.tolist()
+        ):
+            if old_x == new_x and old_y == new_y:
+                continue
+
+            cell = cells[(old_x, old_y)]
+            cell.remove(i)
+            if not cell:
+                del cells[(old_x, old_y)]
+            cells.setdefault((new_x, new_y), []).append(i)
+
+        self.x[idx] = x
+        self.y[idx] = y
+
+    # Прибирає мертві сутності зі збереженням порядку
+    def compact(self):
+        n = self.count
+        keep = self.alive[:n].copy()
+        alive = int(np.count_nonzero(keep))
+        if alive == n:
+            return
+
+        for name in FIELDS:
+            arr = getattr(self, name)
+            arr[:alive] = arr[:n][keep]
+        self.count = alive
+
+        # рядки зсунулись - індекс клітинок будується заново
+        cells = self.cells = {}
+        for i, cell in enumerate(zip(self.x[:alive].tolist(), self.y[:alive].tolist())):
+            cells.setdefault(cell, []).append(i)
+
+    def mask(self, kind):
+        n = self.count
+        mask = self.kind[:n] == kind
+        mask &= self.alive[:n]
+        return mask
+
+    # Живі сутності виду kind у порядку появи
+    def indices(self, kind):
+        return self.mask(kind).nonzero()[0]
+
+    def count_of(self, kind):
+        return int(np.count_nonzero(self.mask(kind)))
+
+    # Живі сутності виду kind у клітинці (x, y) у порядку появи; мертві, ще не стиснені рядки
+    # лишаються в індексі до compact і тут відсіюються
+    def find_all(self, x, y, kind):
+        kinds = self.kind
+        alive = self.alive
+        found = [i for i in self.cells.get((x, y), ()) if kinds[i] == kind and alive[i]]
+        found.sort()
+        return found
+
+    def find(self, x, y, kind):
+        found = self.find_all(x, y, kind)
+        return found[0] if found else None
+
+    # Сутності виду kind, яких видно камері (без камери - усі)
+    def visible(self, kind, camera=None):
+        idx = self.indices(kind)
+        if camera is None:
+            return idx
+
+        x = self.x[idx]
+        y = self.y[idx]
+        mask = (x > camera.x - 1) & (x < camera.x + camera.cols) & (y > camera.y - 1) & (y < camera.y + camera.rows)
+        return idx[mask]
+
+    # Мінус тік для вибухів чи бонусів; ті, чий час вийшов, помирають
+    def tick_lifetime(self, kind):
+        idx = self.indices(kind)
+        if len(idx):
+            self.lifetime[idx] -= 1
+            self.expire(idx)
+        return idx
+
+    # idx - індекси, серед яких шукати тих, чий час вийшов
+    def expire(self, idx):
+        self.alive[idx[self.lifetime[idx] <= 0]] = False
+
+    # Малює видимі сутності виду kind: image(i) - картинка рядка i або None (не малювати,
+    # але прямокутник усе одно повертається, щоб стерти старий кадр). Прямокутники - в координатах екрана
+    def draw(self, screen, kind, image, camera=None):
+        ox, oy = camera.offset if camera else (0, 0)
+        rects = []
+        for i in self.visible(kind, camera).tolist():
+            pos = (int(self.x[i]) * TILE - ox, int(self.y[i]) * TILE - oy)
+            img = image(i)
+            if img is not None:
+                screen.blit(img, pos)
+            rects.append(pygame.Rect(pos[0], pos[1], TILE, TILE))
+        return rects